@@ -20,11 +20,20 @@ Configuration:
   (Extreme, Severe, Moderate, Minor, Unknown)
 
 The NWS API is free, requires no key, and requests a User-Agent header.
+Large GeoJSON responses are decoded with ``orjson`` when it is installed.
 """
 
+import collections
+import functools
+import json
 import threading
 import time
-from datetime import datetime, timezone
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 try:
     import requests
@@ -34,6 +43,54 @@ except ImportError:
 from extensions.base_extension import BaseExtension
 
 
+# ---------------------------------------------------------------------------
+# Formatting
+# ---------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=256)
+def _format_alert_cached(alert_id: str, short: bool, fields: tuple,
+                         max_alert_length: int,
+                         include_instruction: bool) -> str:
+    """Render an alert from its extracted property *fields*.
+
+    Memoized so that the /nws command and the next poll do not format the
+    same alert twice.  *alert_id* is part of the key only to keep entries
+    distinct per alert; the rendered text depends solely on *fields* and
+    the two config values.
+    """
+    event, severity, headline, areas, description, instruction, expires = fields
+
+    if short:
+        text = f"⚠️ {event} [{severity}]"
+        if headline:
+            text += f"\n{headline}"
+        if areas:
+            text += f"\nAreas: {areas}"
+        return text[:max_alert_length]
+
+    parts = [f"⚠️ NWS: {event} [{severity}]"]
+    if headline:
+        parts.append(headline)
+    if areas:
+        parts.append(f"Areas: {areas}")
+    # Truncated fields keep the ellipsis within the limit; short fields
+    # (the common case) are appended without slicing.
+    if description:
+        desc = description.strip()
+        if len(desc) > max_alert_length:
+            desc = desc[:max_alert_length - 3] + "..."
+        parts.append(desc)
+    if include_instruction and instruction:
+        inst = instruction.strip()
+        if len(inst) > 150:
+            inst = inst[:147] + "..."
+        parts.append(f"Action: {inst}")
+    if expires:
+        parts.append(f"Expires: {expires}")
+
+    return "\n".join(parts)
+
+
 class NwsAlertsExtension(BaseExtension):
     """National Weather Service alerts monitor."""
 
@@ -116,7 +173,10 @@ class NwsAlertsExtension(BaseExtension):
     def on_load(self) -> None:
         self._poll_thread = None
         self._stop_event = threading.Event()
+        # Seen alert IDs with FIFO eviction: the deque remembers insertion
+        # order, the set gives O(1) membership.
         self._seen_ids: set = set()
+        self._seen_order: collections.deque = collections.deque(maxlen=500)
 
         sources = []
         if self.zone_ids:
@@ -174,10 +234,11 @@ class NwsAlertsExtension(BaseExtension):
         while not self._stop_event.is_set():
             try:
                 alerts = self._fetch_alerts()
+                pending_texts = []
                 for alert in alerts:
                     alert_id = alert.get("properties", {}).get("id", "")
                     if alert_id and alert_id not in self._seen_ids:
-                        self._seen_ids.add(alert_id)
+                        self._remember(alert_id)
                         props = alert.get("properties", {})
                         # Apply severity filter
                         severity = props.get("severity", "")
@@ -192,16 +253,16 @@ class NwsAlertsExtension(BaseExtension):
                         if self.certainty_filter and certainty not in self.certainty_filter:
                             continue
 
-                        text = self._format_alert(alert, short=False)
-                        self.send_to_mesh(text, channel_index=self.broadcast_channel)
-                        self.log(f"Broadcast NWS alert: {props.get('event', '?')}")
+                        pending_texts.append(self._format_alert(alert, short=False))
+                        self.log(f"New NWS alert: {props.get('event', '?')}")
 
-                # Trim seen set to avoid unbounded growth
-                if len(self._seen_ids) > 500:
-                    # Keep the most recent 250
-                    excess = len(self._seen_ids) - 250
-                    for _ in range(excess):
-                        self._seen_ids.pop()
+                # One bulletin per poll (same separator as /nws); the core
+                # chunker splits it for the radio, so an outbreak of many
+                # alerts costs far fewer transmissions than one send each.
+                if pending_texts:
+                    self.send_to_mesh("\n---\n".join(pending_texts),
+                                      channel_index=self.broadcast_channel)
+                    self.log(f"Broadcast {len(pending_texts)} NWS alert(s) in batch.")
 
             except Exception as exc:
                 self.log(f"NWS poll error: {exc}")
@@ -211,6 +272,13 @@ class NwsAlertsExtension(BaseExtension):
                     break
                 time.sleep(1)
 
+    def _remember(self, alert_id: str) -> None:
+        """Mark *alert_id* as seen, evicting the oldest ID once full."""
+        if len(self._seen_order) == self._seen_order.maxlen:
+            self._seen_ids.discard(self._seen_order[0])
+        self._seen_order.append(alert_id)
+        self._seen_ids.add(alert_id)
+
     # ------------------------------------------------------------------
     # API helpers
     # ------------------------------------------------------------------
@@ -224,7 +292,7 @@ class NwsAlertsExtension(BaseExtension):
             for url in urls:
                 resp = requests.get(url, headers=headers, timeout=15)
                 if resp.status_code == 200:
-                    data = resp.json()
+                    data = _json_loads(resp.content)
                     features = data.get("features", [])
                     alerts.extend(features)
                 else:
@@ -251,38 +319,16 @@ class NwsAlertsExtension(BaseExtension):
     def _format_alert(self, alert: dict, short: bool = False) -> str:
         """Format an NWS alert feature into a mesh-friendly string."""
         props = alert.get("properties", {})
-        event = props.get("event", "Unknown Alert")
-        severity = props.get("severity", "?")
-        headline = props.get("headline", "")
-        areas = props.get("areaDesc", "")
-        description = props.get("description", "")
-        instruction = props.get("instruction", "")
-        expires = props.get("expires", "")
-
-        if short:
-            text = f"⚠️ {event} [{severity}]"
-            if headline:
-                text += f"\n{headline}"
-            if areas:
-                text += f"\nAreas: {areas}"
-            return text[:self.max_alert_length]
-
-        parts = [f"⚠️ NWS: {event} [{severity}]"]
-        if headline:
-            parts.append(headline)
-        if areas:
-            parts.append(f"Areas: {areas}")
-        if description:
-            desc = description.strip()
-            if len(desc) > self.max_alert_length:
-                desc = desc[:self.max_alert_length] + "..."
-            parts.append(desc)
-        if self.include_instruction and instruction:
-            inst = instruction.strip()
-            if len(inst) > 150:
-                inst = inst[:150] + "..."
-            parts.append(f"Action: {inst}")
-        if expires:
-            parts.append(f"Expires: {expires}")
-
-        return "\n".join(parts)
+        fields = (
+            props.get("event", "Unknown Alert"),
+            props.get("severity", "?"),
+            props.get("headline", ""),
+            props.get("areaDesc", ""),
+            props.get("description", ""),
+            props.get("instruction", ""),
+            props.get("expires", ""),
+        )
+        return _format_alert_cached(props.get("id", ""), short, fields,
+                                    self.max_alert_length,
+                                    self.include_instruction)
+
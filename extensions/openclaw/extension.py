@@ -10,15 +10,24 @@ Bridges the Meshtastic mesh network to an OpenClaw AI agent instance:
   distribution.
 
 All configuration lives in this extension's own config.json.
-Requires only the ``requests`` library (already in requirements.txt).
+Requires only the ``requests`` library (already in requirements.txt);
+``orjson`` is used for response decoding when installed.
 """
 
+import json
 import re
 import threading
 import time
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     requests = None
 
@@ -30,12 +39,36 @@ from extensions.base_extension import BaseExtension
 # ---------------------------------------------------------------------------
 
 # Meshtastic node IDs are hex strings like !a1b2c3d4
-_NODE_ID_RE = re.compile(r"^![0-9a-fA-F]{8}$")
+_NODE_ID_RE = re.compile(r"![0-9a-fA-F]{8}")
 
 
 def _is_valid_node_id(node_id: str) -> bool:
     """Return True if *node_id* looks like a valid Meshtastic hex node ID."""
-    return bool(_NODE_ID_RE.match(node_id or ""))
+    return isinstance(node_id, str) and _NODE_ID_RE.fullmatch(node_id) is not None
+
+
+def _starts_with_after_ws(text: str, tag: str) -> bool:
+    """Return True if *text* starts with *tag* once leading whitespace is
+    skipped.  Equivalent to ``text.lstrip().startswith(tag)`` without
+    copying a potentially long AI reply."""
+    i = 0
+    n = len(text)
+    while i < n and text[i].isspace():
+        i += 1
+    return text.startswith(tag, i)
+
+
+# Keys OpenClaw may use for the agent's reply, in order of preference
+_REPLY_KEYS = ("reply", "message", "text", "response")
+
+
+def _pick_reply(d: dict) -> str | None:
+    """Return the first reply value found in *d* as a string, else None."""
+    for key in _REPLY_KEYS:
+        val = d.get(key)
+        if val is not None:
+            return val if isinstance(val, str) else str(val)
+    return None
 
 
 class OpenClawExtension(BaseExtension):
@@ -132,6 +165,19 @@ class OpenClawExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        # Freeze the ACL into a set once so handle_command does an O(1)
+        # membership test; malformed entries could never match anyway.
+        allowed = set()
+        for node_id in self.allowed_nodes:
+            if _is_valid_node_id(node_id):
+                allowed.add(node_id)
+            else:
+                self.log(f"⚠️ Ignoring invalid node ID in allowed_nodes: {node_id!r}")
+        self._allowed_nodes_set = frozenset(allowed)
+        # A non-empty list whose entries were all invalid still denies
+        # everyone rather than silently opening the command up.
+        self._restrict_nodes = bool(self.allowed_nodes)
+
         if requests is None:
             self.log("⚠️ 'requests' library is not installed — OpenClaw extension cannot function.")
             return
@@ -139,6 +185,21 @@ class OpenClawExtension(BaseExtension):
         self._stop_event = threading.Event()
         self._poll_thread = None
 
+        # Bind the base URL and auth headers once; every request reuses a
+        # keep-alive session instead of rebuilding them per call.
+        self._base_url = self.openclaw_url
+        self._headers = self._auth_headers()
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+        # A small pool lets an emergency POST, a /claw query and the poll
+        # GET each hold their own kept-alive connection concurrently.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._prefix_fn = self._bind_prefix_fn()
+        self._poll_enabled = self.poll_enabled
+        self._queue_path = f"/api/agent/{self.agent_name}/queue"
+
         suffix = self._ai_suffix()
         self.log(
             f"OpenClaw enabled. URL={self.openclaw_url}, "
@@ -148,7 +209,7 @@ class OpenClawExtension(BaseExtension):
         )
 
         # Start the optional polling thread for proactive messages
-        if self.poll_enabled:
+        if self._poll_enabled:
             self._poll_thread = threading.Thread(
                 target=self._poll_loop,
                 daemon=True,
@@ -161,6 +222,9 @@ class OpenClawExtension(BaseExtension):
         self._stop_event.set()
         if self._poll_thread and self._poll_thread.is_alive():
             self._poll_thread.join(timeout=5)
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
         self.log("OpenClaw extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -173,7 +237,7 @@ class OpenClawExtension(BaseExtension):
 
         # ACL check — if allowed_nodes is non-empty, enforce it
         sender_id = node_info.get("node_id", "")
-        if self.allowed_nodes and sender_id not in self.allowed_nodes:
+        if self._restrict_nodes and sender_id not in self._allowed_nodes_set:
             return "Access denied."
 
         query = (args or "").strip()
@@ -213,16 +277,7 @@ class OpenClawExtension(BaseExtension):
 
         # Prepend the "m@i" bot-loop marker so MESH-API (and other nodes
         # running MESH-API) will not process this as a human message
-        add_ai_prefix = self.app_context.get("add_ai_prefix")
-        if add_ai_prefix:
-            reply_text = add_ai_prefix(reply_text)
-        else:
-            # Fallback: manually prepend the tag from app_context
-            prefix_tag = self.app_context.get("AI_PREFIX_TAG", "m@i- ")
-            if not reply_text.lstrip().startswith(prefix_tag):
-                reply_text = f"{prefix_tag}{reply_text}"
-
-        return reply_text
+        return self._prefix_fn(reply_text)
 
     def handle_channel_message(self, text: str, node_info: dict) -> str | None:
         """Channel-agent hook (v0.7.0): when a channel is assigned to OpenClaw
@@ -274,11 +329,11 @@ class OpenClawExtension(BaseExtension):
         In practice the background thread (_poll_loop) calls this;
         the loader also calls it periodically if no thread is used.
         """
-        if not self.poll_enabled:
+        if not self._poll_enabled:
             return
 
         try:
-            resp = self._get_openclaw(f"/api/agent/{self.agent_name}/queue")
+            resp = self._get_openclaw(self._queue_path)
         except Exception as exc:
             self.log(f"⚠️ OpenClaw poll error: {exc}")
             return
@@ -293,13 +348,7 @@ class OpenClawExtension(BaseExtension):
                 continue
 
             # Prepend AI marker for loop prevention
-            add_ai_prefix = self.app_context.get("add_ai_prefix")
-            if add_ai_prefix:
-                text = add_ai_prefix(text)
-            else:
-                prefix_tag = self.app_context.get("AI_PREFIX_TAG", "m@i- ")
-                if not text.lstrip().startswith(prefix_tag):
-                    text = f"{prefix_tag}{text}"
+            text = self._prefix_fn(text)
 
             dest = item.get("node_id")
             channel = item.get("channel", 0)
@@ -323,6 +372,16 @@ class OpenClawExtension(BaseExtension):
         if gps_coords:
             payload["gps"] = gps_coords
 
+        # Send from a short-lived thread so a slow OpenClaw instance does
+        # not hold up the other extensions' emergency hooks.
+        threading.Thread(
+            target=self._forward_emergency,
+            args=(payload,),
+            daemon=True,
+            name="openclaw-emergency",
+        ).start()
+
+    def _forward_emergency(self, payload: dict) -> None:
         try:
             self._post_openclaw("/api/agent/emergency", payload)
             self.log("✅ Emergency alert forwarded to OpenClaw.")
@@ -342,16 +401,11 @@ class OpenClawExtension(BaseExtension):
 
     def _post_openclaw(self, path: str, payload: dict) -> dict | None:
         """POST JSON to an OpenClaw endpoint.  Returns parsed JSON or None."""
-        url = f"{self.openclaw_url}{path}"
+        url = self._base_url + path
         try:
-            r = requests.post(
-                url,
-                json=payload,
-                headers=self._auth_headers(),
-                timeout=self.timeout,
-            )
+            r = self._session.post(url, json=payload, timeout=self.timeout)
             r.raise_for_status()
-            return r.json() if r.text.strip() else None
+            return self._parse_body(r)
         except requests.exceptions.Timeout:
             self.log(f"⚠️ OpenClaw request timed out ({self.timeout}s): POST {path}")
             raise
@@ -367,15 +421,11 @@ class OpenClawExtension(BaseExtension):
 
     def _get_openclaw(self, path: str) -> dict | list | None:
         """GET from an OpenClaw endpoint.  Returns parsed JSON or None."""
-        url = f"{self.openclaw_url}{path}"
+        url = self._base_url + path
         try:
-            r = requests.get(
-                url,
-                headers=self._auth_headers(),
-                timeout=self.timeout,
-            )
+            r = self._session.get(url, timeout=self.timeout)
             r.raise_for_status()
-            return r.json() if r.text.strip() else None
+            return self._parse_body(r)
         except requests.exceptions.Timeout:
             self.log(f"⚠️ OpenClaw request timed out ({self.timeout}s): GET {path}")
             raise
@@ -390,6 +440,37 @@ class OpenClawExtension(BaseExtension):
     # Response parsing
     # ------------------------------------------------------------------
 
+    def _bind_prefix_fn(self):
+        """Return a callable that prepends the "m@i" bot-loop marker.
+
+        Prefers the core's ``add_ai_prefix`` helper; otherwise falls back
+        to prepending ``AI_PREFIX_TAG`` unless the text already has it.
+        Resolved once at load so each reply skips the app_context lookups.
+        """
+        add_ai_prefix = self.app_context.get("add_ai_prefix")
+        if callable(add_ai_prefix):
+            return add_ai_prefix
+
+        prefix_tag = self.app_context.get("AI_PREFIX_TAG", "m@i- ")
+
+        def _prefix(text: str) -> str:
+            if _starts_with_after_ws(text, prefix_tag):
+                return text
+            return f"{prefix_tag}{text}"
+
+        return _prefix
+
+    @staticmethod
+    def _parse_body(r) -> dict | list | None:
+        """Parse a response body as JSON, or return None if it is empty.
+
+        Tests the raw bytes (or an explicit zero Content-Length) rather
+        than ``r.text`` so the body is only decoded once, straight from bytes.
+        """
+        if r.headers.get("Content-Length") == "0" or not r.content.strip():
+            return None
+        return _json_loads(r.content)
+
     @staticmethod
     def _extract_reply(resp: dict) -> str:
         """Extract the agent's reply text from an OpenClaw response.
@@ -401,17 +482,14 @@ class OpenClawExtension(BaseExtension):
             return resp
         # Common response shapes: { "reply": "..." } or { "message": "..." }
         # or { "data": { "reply": "..." } }
-        for key in ("reply", "message", "text", "response"):
-            if key in resp:
-                val = resp[key]
-                return val if isinstance(val, str) else str(val)
-        # Nested under "data"
-        data = resp.get("data", {})
+        val = _pick_reply(resp)
+        if val is not None:
+            return val
+        data = resp.get("data")
         if isinstance(data, dict):
-            for key in ("reply", "message", "text", "response"):
-                if key in data:
-                    val = data[key]
-                    return val if isinstance(val, str) else str(val)
+            val = _pick_reply(data)
+            if val is not None:
+                return val
         return ""
 
     # ------------------------------------------------------------------
@@ -420,9 +498,10 @@ class OpenClawExtension(BaseExtension):
 
     def _poll_loop(self) -> None:
         """Background thread: periodically polls OpenClaw for queued messages."""
+        interval = self.poll_interval
         while not self._stop_event.is_set():
             try:
                 self.receive_message()
             except Exception as exc:
                 self.log(f"⚠️ OpenClaw poll loop error: {exc}")
-            self._stop_event.wait(self.poll_interval)
+            self._stop_event.wait(interval)
@@ -14,17 +14,103 @@ and 5-day forecast; One Call API 3.0 needed for alerts).
 Units: "imperial" (°F, mph), "metric" (°C, m/s), or "standard" (K, m/s).
 """
 
+import json
+import os
+import random
 import threading
 import time
+from collections import OrderedDict
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
 from extensions.base_extension import BaseExtension
 
 
+# How long API responses are reused (seconds).  OWM refreshes current
+# conditions roughly every 10 minutes, so repeat /weather, /forecast and
+# auto-broadcast requests for the same place are served from memory.
+CURRENT_TTL = 300
+FORECAST_TTL = 1800
+ALERTS_TTL = 120
+_CACHE_MAX_AGE = max(CURRENT_TTL, FORECAST_TTL, ALERTS_TTL) * 2
+
+# An unchanged auto-broadcast is repeated at most this often (seconds)
+_REBROADCAST_AFTER = 6 * 3600
+
+# Seen alert IDs are remembered across restarts for this long (seconds)
+_SEEN_TTL = 7 * 24 * 3600
+
+# Upper bound (seconds) on the alert poll delay while the API keeps failing
+_MAX_BACKOFF = 3600
+
+_WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+_FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+
+# The 3-hourly forecast is sampled every 8th entry (0, 8, 16) for a 3-day
+# summary, so only the first 17 entries are requested.
+_FORECAST_CNT = 17
+
+_CURRENT_TMPL = (
+    "🌤️ {name}: {desc}\n"
+    "Temp: {temp}{ut} (Feels {feels}{ut})\n"
+    "Humidity: {humidity}% | Wind: {wind} {us}\n"
+    "Hi: {hi}{ut} Lo: {lo}{ut}"
+)
+
+
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient API failures."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3,
+                  status_forcelist=(429, 500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                          max_retries=retry))
+    session.headers.update({"User-Agent": "mesh-api/1.0"})
+    return session
+
+
+def _backoff_delay(interval: int, failures: int) -> float:
+    """Delay before the next poll after *failures* consecutive errors:
+    the normal *interval* doubled per failure (capped) plus jitter."""
+    if not failures:
+        return interval
+    delay = min(interval * (2 ** failures), _MAX_BACKOFF)
+    return delay + random.uniform(0, delay / 4)
+
+
+def _load_seen(path: str) -> "OrderedDict[str, float]":
+    """Load persisted seen-alert IDs, dropping any whose expiry has passed."""
+    seen: OrderedDict[str, float] = OrderedDict()
+    now = time.time()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for alert_id, expiry in json.load(f):
+                if expiry > now:
+                    seen[alert_id] = expiry
+    except (OSError, ValueError, TypeError):
+        pass
+    return seen
+
+
+def _save_seen(path: str, seen: "OrderedDict[str, float]") -> None:
+    """Atomically write the seen-alert IDs (oldest first) to *path*."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(list(seen.items()), f)
+    os.replace(tmp, path)
+
+
 class OpenWeatherMapExtension(BaseExtension):
     """OpenWeatherMap weather data extension."""
 
@@ -97,10 +183,27 @@ class OpenWeatherMapExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        self._api_key = self.api_key
+        self._units = self.units
+        self._default_lat = self.default_lat
+        self._default_lon = self.default_lon
+        self._default_city = self.default_city
         self._stop_event = threading.Event()
-        self._wx_thread = None
-        self._alert_thread = None
-        self._seen_alert_ids: set = set()
+        self._poll_thread = None
+        # Insertion-ordered so the oldest IDs are evicted first; persisted
+        # so a restart does not re-broadcast alerts already sent
+        self._seen_path = os.path.join(self.extension_dir, "owm_seen.json")
+        self._seen_alert_ids = _load_seen(self._seen_path)
+        self._session = _make_session() if requests else None
+        self._resp_cache: dict[tuple, tuple[float, object]] = {}
+        self._unit_temp = {"imperial": "°F", "metric": "°C"}.get(self.units, "K")
+        self._unit_speed = "mph" if self.units == "imperial" else "m/s"
+        self._last_broadcast_text = ""
+        self._last_broadcast_ts = 0.0
+        self._cache_lock = threading.Lock()
+        # Fetches in progress, so concurrent identical requests share one
+        # API call: key -> (done event, [result, exception])
+        self._inflight: dict[tuple, tuple[threading.Event, list]] = {}
 
         if not self.api_key:
             self.log("OpenWeatherMap enabled but no API key set.")
@@ -113,27 +216,28 @@ class OpenWeatherMapExtension(BaseExtension):
             status.append(f"coords={self.default_lat},{self.default_lon}")
         self.log(f"OpenWeatherMap enabled. {', '.join(status)}")
 
-        if self.auto_broadcast and (self.default_city or (self.default_lat and self.default_lon)):
-            self._wx_thread = threading.Thread(
-                target=self._broadcast_weather_loop,
-                daemon=True,
-                name="owm-broadcast",
-            )
-            self._wx_thread.start()
+        self._wx_enabled = bool(
+            self.auto_broadcast
+            and (self.default_city or (self.default_lat and self.default_lon)))
+        self._alerts_enabled = bool(
+            self.alert_broadcast and self.default_lat and self.default_lon)
 
-        if self.alert_broadcast and self.default_lat and self.default_lon:
-            self._alert_thread = threading.Thread(
-                target=self._alert_monitor_loop,
+        # One thread drives both periodic jobs on their own schedules
+        if self._wx_enabled or self._alerts_enabled:
+            self._poll_thread = threading.Thread(
+                target=self._poll_loop,
                 daemon=True,
-                name="owm-alerts",
+                name="owm-poll",
             )
-            self._alert_thread.start()
+            self._poll_thread.start()
 
     def on_unload(self) -> None:
         self._stop_event.set()
-        for t in (self._wx_thread, self._alert_thread):
-            if t and t.is_alive():
-                t.join(timeout=5)
+        if self._poll_thread and self._poll_thread.is_alive():
+            self._poll_thread.join(timeout=5)
+        self._persist_seen()
+        if self._session is not None:
+            self._session.close()
         self.log("OpenWeatherMap extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -142,23 +246,23 @@ class OpenWeatherMapExtension(BaseExtension):
 
     def handle_command(self, command: str, args: str, node_info: dict) -> str | None:
         if command == "/weather":
-            city = args.strip() if args.strip() else self.default_city
-            if not city and self.default_lat and self.default_lon:
-                return self._get_weather_by_coords(self.default_lat, self.default_lon)
+            city = args.strip() if args.strip() else self._default_city
+            if not city and self._default_lat and self._default_lon:
+                return self._get_weather_by_coords(self._default_lat, self._default_lon)
             if not city:
                 return "Usage: /weather <city name>"
             return self._get_weather_by_city(city)
 
         if command == "/forecast":
-            city = args.strip() if args.strip() else self.default_city
-            if not city and self.default_lat and self.default_lon:
-                return self._get_forecast_by_coords(self.default_lat, self.default_lon)
+            city = args.strip() if args.strip() else self._default_city
+            if not city and self._default_lat and self._default_lon:
+                return self._get_forecast_by_coords(self._default_lat, self._default_lon)
             if not city:
                 return "Usage: /forecast <city name>"
             return self._get_forecast_by_city(city)
 
         if command == "/wxalerts":
-            if not self.default_lat or not self.default_lon:
+            if not self._default_lat or not self._default_lon:
                 return "No default coordinates configured for alerts."
             return self._get_alerts()
 
@@ -168,103 +272,208 @@ class OpenWeatherMapExtension(BaseExtension):
     # Background loops
     # ------------------------------------------------------------------
 
-    def _broadcast_weather_loop(self) -> None:
-        time.sleep(15)
-        while not self._stop_event.is_set():
-            try:
-                if self.default_city:
-                    text = self._get_weather_by_city(self.default_city)
-                elif self.default_lat and self.default_lon:
-                    text = self._get_weather_by_coords(self.default_lat, self.default_lon)
-                else:
-                    text = None
-                if text:
-                    self.send_to_mesh(text, channel_index=self.broadcast_channel)
-                    self.log("Auto-broadcast weather update.")
-            except Exception as exc:
-                self.log(f"Weather broadcast error: {exc}")
-            for _ in range(self.broadcast_interval):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(1)
-
-    def _alert_monitor_loop(self) -> None:
-        time.sleep(20)
-        while not self._stop_event.is_set():
-            try:
-                alerts = self._fetch_alerts_raw()
-                for alert in alerts:
-                    event = alert.get("event", "")
-                    sender = alert.get("sender_name", "")
-                    desc = alert.get("description", "")
-                    start = alert.get("start")
-                    end = alert.get("end")
-                    # Create a simple ID from event + start
-                    alert_id = f"{event}_{start}"
-                    if alert_id in self._seen_alert_ids:
-                        continue
-                    self._seen_alert_ids.add(alert_id)
-                    text = f"⚠️ Weather Alert: {event}"
-                    if sender:
-                        text += f" ({sender})"
-                    if desc:
-                        short_desc = desc[:250] + "..." if len(desc) > 250 else desc
-                        text += f"\n{short_desc}"
-                    self.send_to_mesh(text, channel_index=self.broadcast_channel)
-                    self.log(f"Broadcast weather alert: {event}")
-                # Trim
+    def _poll_loop(self) -> None:
+        """Run the weather broadcast and alert monitor from one thread.
+
+        Each job keeps its own next-due time (after the original 15 s /
+        20 s startup delays); the thread sleeps until the earliest one.
+        """
+        now = time.monotonic()
+        next_wx = now + 15 if self._wx_enabled else None
+        next_alert = now + 20 if self._alerts_enabled else None
+        alert_failures = 0
+        while True:
+            due = min(t for t in (next_wx, next_alert) if t is not None)
+            if self._stop_event.wait(max(0.0, due - time.monotonic())):
+                return
+            now = time.monotonic()
+            if next_wx is not None and now >= next_wx:
+                self._broadcast_weather()
+                next_wx = time.monotonic() + self.broadcast_interval
+            if next_alert is not None and now >= next_alert:
+                alert_failures = 0 if self._check_alerts() else alert_failures + 1
+                next_alert = time.monotonic() + _backoff_delay(
+                    self.alert_poll_interval, alert_failures)
+
+    def _broadcast_weather(self) -> None:
+        try:
+            if self._default_city:
+                text = self._get_weather_by_city(self._default_city)
+            elif self._default_lat and self._default_lon:
+                text = self._get_weather_by_coords(self._default_lat, self._default_lon)
+            else:
+                text = None
+            if not text:
+                return
+            # Skip an unchanged report unless the last send is stale
+            now = time.monotonic()
+            if (text == self._last_broadcast_text
+                    and now - self._last_broadcast_ts < _REBROADCAST_AFTER):
+                return
+            self.send_to_mesh(text, channel_index=self.broadcast_channel)
+            self._last_broadcast_text = text
+            self._last_broadcast_ts = now
+            self.log("Auto-broadcast weather update.")
+        except Exception as exc:
+            self.log(f"Weather broadcast error: {exc}")
+
+    def _check_alerts(self) -> bool:
+        """Broadcast new One Call alerts; returns False if the fetch failed."""
+        try:
+            alerts = self._fetch_alerts_raw(stale_ok=False)
+            if alerts is None:
+                return False
+            added = False
+            for alert in alerts:
+                event = alert.get("event", "")
+                sender = alert.get("sender_name", "")
+                desc = alert.get("description", "")
+                start = alert.get("start")
+                # Create a simple ID from event + start
+                alert_id = f"{event}_{start}"
+                if alert_id in self._seen_alert_ids:
+                    continue
+                self._seen_alert_ids[alert_id] = time.time() + _SEEN_TTL
                 if len(self._seen_alert_ids) > 200:
-                    excess = len(self._seen_alert_ids) - 100
-                    for _ in range(excess):
-                        self._seen_alert_ids.pop()
-            except Exception as exc:
-                self.log(f"Weather alert monitor error: {exc}")
-            for _ in range(self.alert_poll_interval):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(1)
+                    self._seen_alert_ids.popitem(last=False)
+                added = True
+                text = f"⚠️ Weather Alert: {event}"
+                if sender:
+                    text += f" ({sender})"
+                if desc:
+                    short_desc = desc[:250] + "..." if len(desc) > 250 else desc
+                    text += f"\n{short_desc}"
+                self.send_to_mesh(text, channel_index=self.broadcast_channel)
+                self.log(f"Broadcast weather alert: {event}")
+            if added:
+                self._persist_seen()
+        except Exception as exc:
+            self.log(f"Weather alert monitor error: {exc}")
+            return False
+        return True
+
+    def _persist_seen(self) -> None:
+        try:
+            _save_seen(self._seen_path, self._seen_alert_ids)
+        except OSError as exc:
+            self.log(f"Could not save seen weather alerts: {exc}")
 
     # ------------------------------------------------------------------
-    # API helpers — Current Weather
+    # Response cache
     # ------------------------------------------------------------------
 
-    def _get_weather_by_city(self, city: str) -> str:
+    def _cached(self, key: tuple, ttl: int, fetch, stale_ok: bool = True):
+        """Return the cached result for *key* if younger than *ttl* seconds,
+        otherwise call *fetch()*.
+
+        *fetch* returns ``(result, ok)``; only successful results are
+        cached so an API error is retried on the next request.  If the
+        fetch fails and *stale_ok* is set, an expired (but not yet pruned)
+        entry is returned instead so mesh users get stale data rather than
+        an error.
+
+        Concurrent misses on the same *key* are coalesced: the first
+        caller fetches and the others wait for its result.
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            hit = self._resp_cache.get(key)
+            if hit and now - hit[0] < ttl:
+                return hit[1]
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                entry = self._inflight[key] = (threading.Event(), [None, None])
+        if inflight is not None:
+            done, outcome = inflight
+            if done.wait(15):
+                if outcome[1] is not None:
+                    raise outcome[1]
+                return outcome[0]
+            # The leader is stuck; fetch independently
+            return self._fetch_into_cache(key, hit, fetch, stale_ok, now)
+        done, outcome = entry
         try:
-            params = {"q": city, "appid": self.api_key, "units": self.units}
-            resp = requests.get("https://api.openweathermap.org/data/2.5/weather",
-                                params=params, timeout=10)
-            if resp.status_code != 200:
-                return f"OWM error {resp.status_code}"
-            return self._format_current(resp.json())
+            outcome[0] = self._fetch_into_cache(key, hit, fetch, stale_ok, now)
+            return outcome[0]
         except Exception as exc:
-            return f"Weather error: {exc}"
-
-    def _get_weather_by_coords(self, lat: str, lon: str) -> str:
+            outcome[1] = exc
+            raise
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    def _fetch_into_cache(self, key: tuple, hit, fetch, stale_ok: bool,
+                          now: float):
+        """Run *fetch* for a cache miss and store a successful result."""
+        if not stale_ok:
+            hit = None
         try:
-            params = {"lat": lat, "lon": lon, "appid": self.api_key, "units": self.units}
-            resp = requests.get("https://api.openweathermap.org/data/2.5/weather",
-                                params=params, timeout=10)
+            result, ok = fetch()
+        except Exception:
+            # Serve stale data rather than an error while the API is down
+            if hit:
+                return hit[1]
+            raise
+        if not ok and hit:
+            return hit[1]
+        if ok:
+            with self._cache_lock:
+                self._resp_cache[key] = (now, result)
+                # Drop entries no TTL could still serve
+                stale = [k for k, (ts, _) in self._resp_cache.items()
+                         if now - ts > _CACHE_MAX_AGE]
+                for k in stale:
+                    del self._resp_cache[k]
+        return result
+
+    def _owm_fetch(self, key: tuple, ttl: int, url: str, params: dict,
+                   formatter, kind: str) -> str:
+        """GET *url* through the response cache and render it with
+        *formatter*; errors come back as mesh-ready text labelled *kind*."""
+        params = {**params, "appid": self._api_key, "units": self._units}
+
+        def fetch():
+            resp = self._session.get(url, params=params, timeout=10)
             if resp.status_code != 200:
-                return f"OWM error {resp.status_code}"
-            return self._format_current(resp.json())
+                label = "OWM error" if kind == "Weather" else f"OWM {kind.lower()} error"
+                return f"{label} {resp.status_code}", False
+            return formatter(_json_loads(resp.content)), True
+        try:
+            return self._cached(key, ttl, fetch)
         except Exception as exc:
-            return f"Weather error: {exc}"
+            return f"{kind} error: {exc}"
+
+    # ------------------------------------------------------------------
+    # API helpers — Current Weather
+    # ------------------------------------------------------------------
+
+    def _get_weather_by_city(self, city: str) -> str:
+        return self._owm_fetch(("wx_city", city.lower(), self._units), CURRENT_TTL,
+                               _WEATHER_URL, {"q": city},
+                               self._format_current, "Weather")
+
+    def _get_weather_by_coords(self, lat: str, lon: str) -> str:
+        return self._owm_fetch(("wx_coords", lat, lon, self._units), CURRENT_TTL,
+                               _WEATHER_URL, {"lat": lat, "lon": lon},
+                               self._format_current, "Weather")
 
     def _format_current(self, data: dict) -> str:
         name = data.get("name", "?")
         main = data.get("main", {})
         weather = data.get("weather", [{}])[0]
         wind = data.get("wind", {})
-        unit_temp = "°F" if self.units == "imperial" else "°C" if self.units == "metric" else "K"
-        unit_speed = "mph" if self.units == "imperial" else "m/s"
-        return (
-            f"🌤️ {name}: {weather.get('description', '?').title()}\n"
-            f"Temp: {main.get('temp', '?')}{unit_temp} "
-            f"(Feels {main.get('feels_like', '?')}{unit_temp})\n"
-            f"Humidity: {main.get('humidity', '?')}% | "
-            f"Wind: {wind.get('speed', '?')} {unit_speed}\n"
-            f"Hi: {main.get('temp_max', '?')}{unit_temp} "
-            f"Lo: {main.get('temp_min', '?')}{unit_temp}"
+        return _CURRENT_TMPL.format(
+            name=name,
+            desc=weather.get("description", "?").title(),
+            temp=main.get("temp", "?"),
+            feels=main.get("feels_like", "?"),
+            humidity=main.get("humidity", "?"),
+            wind=wind.get("speed", "?"),
+            hi=main.get("temp_max", "?"),
+            lo=main.get("temp_min", "?"),
+            ut=self._unit_temp,
+            us=self._unit_speed,
         )
 
     # ------------------------------------------------------------------
@@ -272,35 +481,23 @@ class OpenWeatherMapExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def _get_forecast_by_city(self, city: str) -> str:
-        try:
-            params = {"q": city, "appid": self.api_key, "units": self.units, "cnt": 24}
-            resp = requests.get("https://api.openweathermap.org/data/2.5/forecast",
-                                params=params, timeout=10)
-            if resp.status_code != 200:
-                return f"OWM forecast error {resp.status_code}"
-            return self._format_forecast(resp.json())
-        except Exception as exc:
-            return f"Forecast error: {exc}"
+        return self._owm_fetch(("fc_city", city.lower(), self._units), FORECAST_TTL,
+                               _FORECAST_URL, {"q": city, "cnt": _FORECAST_CNT},
+                               self._format_forecast, "Forecast")
 
     def _get_forecast_by_coords(self, lat: str, lon: str) -> str:
-        try:
-            params = {"lat": lat, "lon": lon, "appid": self.api_key,
-                       "units": self.units, "cnt": 24}
-            resp = requests.get("https://api.openweathermap.org/data/2.5/forecast",
-                                params=params, timeout=10)
-            if resp.status_code != 200:
-                return f"OWM forecast error {resp.status_code}"
-            return self._format_forecast(resp.json())
-        except Exception as exc:
-            return f"Forecast error: {exc}"
+        return self._owm_fetch(("fc_coords", lat, lon, self._units), FORECAST_TTL,
+                               _FORECAST_URL,
+                               {"lat": lat, "lon": lon, "cnt": _FORECAST_CNT},
+                               self._format_forecast, "Forecast")
 
     def _format_forecast(self, data: dict) -> str:
         city_name = data.get("city", {}).get("name", "?")
         items = data.get("list", [])
-        unit_temp = "°F" if self.units == "imperial" else "°C" if self.units == "metric" else "K"
+        unit_temp = self._unit_temp
         lines = [f"📅 Forecast: {city_name}"]
         # Show every 8th entry (one per day for 3 days from 3-hour data)
-        for i in range(0, min(len(items), 24), 8):
+        for i in range(0, min(len(items), _FORECAST_CNT), 8):
             entry = items[i]
             dt_txt = entry.get("dt_txt", "?")
             main = entry.get("main", {})
@@ -315,29 +512,39 @@ class OpenWeatherMapExtension(BaseExtension):
     # API helpers — Alerts (One Call API 3.0)
     # ------------------------------------------------------------------
 
-    def _fetch_alerts_raw(self) -> list:
-        """Fetch weather alerts from One Call API."""
-        if not self.default_lat or not self.default_lon:
+    def _fetch_alerts_raw(self, stale_ok: bool = True) -> list | None:
+        """Fetch weather alerts from One Call API.  Returns None on failure.
+
+        The alert poller passes ``stale_ok=False`` so an outage is seen as
+        a failure (and backed off) instead of replaying cached alerts.
+        """
+        if not self._default_lat or not self._default_lon:
             return []
-        try:
+        def fetch():
             params = {
-                "lat": self.default_lat,
-                "lon": self.default_lon,
-                "appid": self.api_key,
+                "lat": self._default_lat,
+                "lon": self._default_lon,
+                "appid": self._api_key,
                 "exclude": "minutely,hourly,daily,current",
             }
-            resp = requests.get(
+            resp = self._session.get(
                 "https://api.openweathermap.org/data/3.0/onecall",
                 params=params, timeout=10,
             )
             if resp.status_code == 200:
-                return resp.json().get("alerts", [])
+                return _json_loads(resp.content).get("alerts", []), True
+            return None, False
+        try:
+            return self._cached(("alerts", self._default_lat, self._default_lon),
+                                ALERTS_TTL, fetch, stale_ok)
         except Exception as exc:
             self.log(f"OWM alerts fetch error: {exc}")
-        return []
+        return None
 
     def _get_alerts(self) -> str:
         alerts = self._fetch_alerts_raw()
+        if alerts is None:
+            return "⚠️ Could not fetch weather alerts."
         if not alerts:
             return "No active weather alerts."
         lines = []
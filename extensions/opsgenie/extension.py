@@ -15,20 +15,104 @@ Features:
 
 Authentication:
 - api_key: OpsGenie API key (GenieKey) with create/read/update permissions.
+
+Keyword scanning uses ``pyahocorasick`` when installed, falling back to a
+single precompiled regex.
 """
 
+import concurrent.futures
+import json
+import os
+import queue
+import random
+import re
 import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
 from extensions.base_extension import BaseExtension
 
 
+# Keyword-triggered alerts arriving within this window (seconds) are
+# coalesced into one OpsGenie alert; a mesh emergency is usually a single
+# event even when several nodes match a keyword.
+_KEYWORD_BATCH_WINDOW = 2.0
+_KEYWORD_BATCH_MAX = 10
+
+# A poll's open-alert listing answers /og status for this long (seconds)
+_LISTING_REUSE = 30
+
+# Leading characters of a message searched for trigger keywords
+_KEYWORD_SCAN_LIMIT = 2048
+
+# Seen alert IDs are remembered across restarts for this long (seconds)
+_SEEN_TTL = 7 * 24 * 3600
+
+# Upper bound (seconds) on the poll delay while the API keeps failing
+_MAX_BACKOFF = 3600
+
+
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient API failures."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3,
+                  status_forcelist=(429, 500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                          max_retries=retry))
+    session.headers.update({"User-Agent": "mesh-api/1.0"})
+    return session
+
+
+def _backoff_delay(interval: int, failures: int) -> float:
+    """Delay before the next poll after *failures* consecutive errors:
+    the normal *interval* doubled per failure (capped) plus jitter."""
+    if not failures:
+        return interval
+    delay = min(interval * (2 ** failures), _MAX_BACKOFF)
+    return delay + random.uniform(0, delay / 4)
+
+
+def _load_seen(path: str) -> "OrderedDict[str, float]":
+    """Load persisted seen-alert IDs, dropping any whose expiry has passed."""
+    seen: OrderedDict[str, float] = OrderedDict()
+    now = time.time()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for alert_id, expiry in json.load(f):
+                if expiry > now:
+                    seen[alert_id] = expiry
+    except (OSError, ValueError, TypeError):
+        pass
+    return seen
+
+
+def _save_seen(path: str, seen: "OrderedDict[str, float]") -> None:
+    """Atomically write the seen-alert IDs (oldest first) to *path*."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(list(seen.items()), f)
+    os.replace(tmp, path)
+
+
 class OpsgenieExtension(BaseExtension):
     """OpsGenie alert management extension."""
 
@@ -93,29 +177,68 @@ class OpsgenieExtension(BaseExtension):
 
     # -- lifecycle --
     def on_load(self) -> None:
-        self._poll_thread = None
         self._stop = threading.Event()
-        self._known_ids: set = set()
+        # Insertion-ordered so the oldest IDs are evicted first; persisted
+        # so a restart does not re-broadcast alerts already sent
+        self._seen_path = os.path.join(self.extension_dir, "og_seen.json")
+        self._known_ids = _load_seen(self._seen_path)
+        self._last_status = ""
+        # (monotonic time, alerts) from the latest open-alerts listing
+        self._open_alerts: tuple[float, list] | None = None
+        self._session = None
+        if requests:
+            self._session = _make_session()
+            self._session.headers.update({
+                "Authorization": f"GenieKey {self.api_key}",
+                "Content-Type": "application/json",
+            })
+        # Config-static part of every created alert
+        self._base_payload: dict = {"tags": self.tags, "source": "mesh-api"}
+        if self.responders:
+            self._base_payload["responders"] = self.responders
         self.log(f"OpsGenie enabled. API key {'set' if self.api_key else 'NOT set'}.")
 
-        if self.poll_alerts and self.api_key:
-            self._poll_thread = threading.Thread(
-                target=self._poll_loop, daemon=True, name="og-poll")
-            self._poll_thread.start()
+        # Match all trigger keywords in one case-insensitive pass
+        self._kw_by_upper = {kw.upper(): kw for kw in self.trigger_keywords}
+        self._kw_ac = None
+        self._kw_re = None
+        if self._kw_by_upper:
+            if ahocorasick is not None:
+                self._kw_ac = ahocorasick.Automaton()
+                for upper, kw in self._kw_by_upper.items():
+                    self._kw_ac.add_word(upper, kw)
+                self._kw_ac.make_automaton()
+            else:
+                self._kw_re = re.compile("|".join(map(re.escape, self._kw_by_upper)))
+        # ack/close/status run here and reply by DM, so a slow OpsGenie
+        # API never holds up the mesh command dispatcher
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="og-cmd")
+        self._pending: set = set()
+        self._pending_lock = threading.Lock()
+        self._alert_queue: queue.Queue = queue.Queue()
+        self._poll_enabled = bool(self.poll_alerts)
+        # One thread drives both keyword alerts and polling
+        self._worker = None
+        if self.api_key and (self._kw_by_upper or self._poll_enabled):
+            self._worker = threading.Thread(
+                target=self._worker_loop, daemon=True, name="og-worker")
+            self._worker.start()
 
     def on_unload(self) -> None:
         self._stop.set()
-        if self._poll_thread and self._poll_thread.is_alive():
-            self._poll_thread.join(timeout=10)
+        if self._worker and self._worker.is_alive():
+            self._worker.join(timeout=10)
+        self._persist_seen()
+        with self._pending_lock:
+            pending = list(self._pending)
+        for fut in pending:
+            fut.cancel()
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("OpsGenie extension unloaded.")
 
-    # -- auth header --
-    def _headers(self) -> dict:
-        return {
-            "Authorization": f"GenieKey {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
     # -- commands --
     def handle_command(self, command: str, args: str, node_info: dict) -> str | None:
         if command != "/og":
@@ -129,13 +252,55 @@ class OpsgenieExtension(BaseExtension):
                 return "Usage: /og alert <message>"
             return self._create_alert(rest)
         if sub == "ack":
-            return self._ack_alert(rest.strip())
+            if not rest.strip():
+                return "Usage: /og ack <alert_id_or_alias>"
+            ident = rest.strip()
+            return self._submit(self._ack_alert, ident, node_info,
+                                f"⏳ Acknowledging {ident}…")
         if sub == "close":
-            return self._close_alert(rest.strip())
+            if not rest.strip():
+                return "Usage: /og close <alert_id_or_alias>"
+            ident = rest.strip()
+            return self._submit(self._close_alert, ident, node_info,
+                                f"⏳ Closing {ident}…")
         if sub == "status":
-            return self._list_alerts()
+            return self._submit(self._list_alerts, None, node_info,
+                                "⏳ Fetching from OpsGenie…")
         return "Usage: /og alert|ack|close|status"
 
+    def _submit(self, fn, arg, node_info: dict, placeholder: str) -> str:
+        """Run an OpsGenie call on the command pool and reply when it is done.
+
+        *placeholder* is returned as the immediate answer.  The reply is a
+        DM to the sender, or goes to the channel the command came in on
+        when there is no sender ID; it is never broadcast on the default
+        channel.
+        """
+        node_info = node_info or {}
+        dest = node_info.get("node_id")
+        channel = node_info.get("channel_idx")
+        fut = self._executor.submit(fn) if arg is None else self._executor.submit(fn, arg)
+        with self._pending_lock:
+            self._pending.add(fut)
+
+        def _deliver(f: concurrent.futures.Future) -> None:
+            with self._pending_lock:
+                self._pending.discard(f)
+            if f.cancelled():
+                return
+            try:
+                if dest:
+                    self.send_to_mesh(f.result(), destination_id=dest)
+                elif channel is not None:
+                    self.send_to_mesh(f.result(), channel_index=channel)
+                else:
+                    self.log(f"OG command reply with no sender or channel: {f.result()}")
+            except Exception as exc:
+                self.log(f"OG command reply error: {exc}")
+
+        fut.add_done_callback(_deliver)
+        return placeholder
+
     # -- hooks --
     def on_emergency(self, message: str, gps_coords: dict | None = None) -> None:
         if not self.trigger_on_emergency or not self.api_key:
@@ -146,36 +311,78 @@ class OpsgenieExtension(BaseExtension):
         self._create_alert(desc, priority="P1")
 
     def on_message(self, message: str, node_info: dict) -> None:
-        if not self.api_key or not self.trigger_keywords:
+        if not self.api_key or not self._kw_by_upper:
             return
-        upper = message.upper()
-        for kw in self.trigger_keywords:
-            if kw.upper() in upper:
-                sender = node_info.get("shortname", "?")
-                self._create_alert(
-                    f"Keyword '{kw}' from {sender}: {message[:300]}",
-                    priority=self.default_priority,
-                )
+        # Only the first 2 KB is scanned: mesh packets are far smaller, but
+        # text bridged in from other extensions can be arbitrarily long.
+        kw = self._match_keyword(message[:_KEYWORD_SCAN_LIMIT].upper())
+        if kw is None:
+            return
+        sender = (node_info or {}).get("shortname", "?")
+        # Hand off to the worker so the mesh handler never blocks on HTTP
+        self._alert_queue.put(f"Keyword '{kw}' from {sender}: {message[:300]}")
+
+    def _match_keyword(self, upper: str) -> str | None:
+        """Return the configured keyword found in *upper*, if any."""
+        if self._kw_ac is not None:
+            for _, kw in self._kw_ac.iter(upper):
+                return kw
+            return None
+        m = self._kw_re.search(upper)
+        return self._kw_by_upper.get(m.group(0)) if m else None
+
+    def _worker_loop(self) -> None:
+        """Create alerts for queued keyword triggers and run the alert poll
+        when due, so both jobs share a single background thread."""
+        next_poll = time.monotonic() + 15 if self._poll_enabled else None
+        failures = 0
+        while not self._stop.is_set():
+            timeout = 1.0
+            if next_poll is not None:
+                timeout = min(timeout, max(0.0, next_poll - time.monotonic()))
+            try:
+                first = self._alert_queue.get(timeout=timeout)
+            except queue.Empty:
+                first = None
+            if first is not None:
+                self._send_keyword_batch(first)
+            if next_poll is not None and time.monotonic() >= next_poll:
+                failures = 0 if self._poll_once() else failures + 1
+                # Back off exponentially while OpsGenie is failing
+                next_poll = time.monotonic() + _backoff_delay(self.poll_interval,
+                                                             failures)
+
+    def _send_keyword_batch(self, first: str) -> None:
+        """Create one alert for *first* plus any triggers queued behind it."""
+        # Let closely spaced triggers arrive before sending
+        self._stop.wait(_KEYWORD_BATCH_WINDOW)
+        batch = [first]
+        while len(batch) < _KEYWORD_BATCH_MAX:
+            try:
+                batch.append(self._alert_queue.get_nowait())
+            except queue.Empty:
                 break
+        if len(batch) == 1:
+            message = batch[0]
+        else:
+            message = f"{len(batch)} keyword triggers:\n" + "\n".join(batch)
+        self._create_alert(message, priority=self.default_priority)
 
     # -- API calls --
     def _create_alert(self, message: str, priority: str | None = None) -> str:
         if not self.api_key:
             return "No OpsGenie API key configured."
         try:
-            payload: dict = {
+            payload = {
+                **self._base_payload,
                 "message": message[:130],
                 "description": message,
                 "priority": priority or self.default_priority,
-                "tags": self.tags,
-                "source": "mesh-api",
             }
-            if self.responders:
-                payload["responders"] = self.responders
-            resp = requests.post(f"{self.api_base}/v2/alerts", json=payload,
-                                 headers=self._headers(), timeout=10)
+            resp = self._session.post(f"{self.api_base}/v2/alerts", json=payload,
+                                      timeout=10)
             if resp.status_code in (200, 201, 202):
-                data = resp.json()
+                data = _json_loads(resp.content)
                 req_id = data.get("requestId", "?")
                 self.log(f"OpsGenie alert created: {req_id}")
                 return f"🚨 OpsGenie alert created ({priority or self.default_priority})."
@@ -190,9 +397,9 @@ class OpsgenieExtension(BaseExtension):
             return "No API key configured."
         try:
             url = f"{self.api_base}/v2/alerts/{identifier}/acknowledge"
-            resp = requests.post(url, json={"source": "mesh-api"},
-                                 headers=self._headers(), timeout=10)
+            resp = self._session.post(url, json={"source": "mesh-api"}, timeout=10)
             if resp.status_code in (200, 202):
+                self._open_alerts = None  # the cached listing no longer matches
                 return f"✅ Alert {identifier} acknowledged."
             return f"⚠️ Ack failed: {resp.status_code}"
         except Exception as exc:
@@ -205,9 +412,9 @@ class OpsgenieExtension(BaseExtension):
             return "No API key configured."
         try:
             url = f"{self.api_base}/v2/alerts/{identifier}/close"
-            resp = requests.post(url, json={"source": "mesh-api"},
-                                 headers=self._headers(), timeout=10)
+            resp = self._session.post(url, json={"source": "mesh-api"}, timeout=10)
             if resp.status_code in (200, 202):
+                self._open_alerts = None
                 return f"✅ Alert {identifier} closed."
             return f"⚠️ Close failed: {resp.status_code}"
         except Exception as exc:
@@ -217,50 +424,77 @@ class OpsgenieExtension(BaseExtension):
         if not self.api_key:
             return "No API key configured."
         try:
-            params = {"query": "status=open", "limit": 10, "order": "desc"}
-            resp = requests.get(f"{self.api_base}/v2/alerts", params=params,
-                                headers=self._headers(), timeout=10)
-            if resp.status_code != 200:
-                return f"⚠️ OG list error: {resp.status_code}"
-            alerts = resp.json().get("data", [])
+            cached = self._open_alerts
+            if cached and time.monotonic() - cached[0] < _LISTING_REUSE:
+                alerts = cached[1]
+            else:
+                resp = self._fetch_open_alerts()
+                if resp.status_code != 200:
+                    return self._stale_status(f"⚠️ OG list error: {resp.status_code}")
+                alerts = _json_loads(resp.content).get("data", [])
+                self._open_alerts = (time.monotonic(), alerts)
             if not alerts:
-                return "✅ No open OpsGenie alerts."
-            lines = [f"🚨 Open Alerts ({len(alerts)}):"]
-            for a in alerts[:8]:
-                aid = a.get("tinyId", a.get("id", "?"))
-                pri = a.get("priority", "?")
-                msg = a.get("message", "?")[:50]
-                status = a.get("status", "?")
-                lines.append(f"  [{aid}] {pri} {status}: {msg}")
-            return "\n".join(lines)
+                text = "✅ No open OpsGenie alerts."
+            else:
+                lines = [f"🚨 Open Alerts ({len(alerts)}):"]
+                for a in alerts[:8]:
+                    aid = a.get("tinyId", a.get("id", "?"))
+                    pri = a.get("priority", "?")
+                    msg = a.get("message", "?")[:50]
+                    status = a.get("status", "?")
+                    lines.append(f"  [{aid}] {pri} {status}: {msg}")
+                text = "\n".join(lines)
+            self._last_status = text
+            return text
         except Exception as exc:
-            return f"⚠️ OG list error: {exc}"
+            return self._stale_status(f"⚠️ OG list error: {exc}")
+
+    def _fetch_open_alerts(self):
+        """GET the newest open alerts (shared by /og status and the poller)."""
+        params = {"query": "status=open", "limit": 10, "order": "desc"}
+        return self._session.get(f"{self.api_base}/v2/alerts", params=params,
+                                 timeout=10)
+
+    def _stale_status(self, error: str) -> str:
+        """Fall back to the last good status listing when the API fails."""
+        if not self._last_status:
+            return error
+        return f"{self._last_status}\n(cached — {error.lstrip('⚠️ ')})"
 
     # -- polling --
-    def _poll_loop(self) -> None:
-        time.sleep(15)
-        while not self._stop.is_set():
-            try:
-                params = {"query": "status=open", "limit": 5, "order": "desc"}
-                resp = requests.get(f"{self.api_base}/v2/alerts", params=params,
-                                    headers=self._headers(), timeout=10)
-                if resp.status_code == 200:
-                    for a in resp.json().get("data", []):
-                        aid = a.get("id")
-                        if aid and aid not in self._known_ids:
-                            self._known_ids.add(aid)
-                            msg = a.get("message", "?")[:80]
-                            pri = a.get("priority", "?")
-                            tiny = a.get("tinyId", aid[:8])
-                            self.send_to_mesh(
-                                f"🚨 OG: [{pri}] {msg} (#{tiny})",
-                                channel_index=self.broadcast_channel,
-                            )
-                if len(self._known_ids) > 200:
-                    self._known_ids = set(list(self._known_ids)[-100:])
-            except Exception as exc:
-                self.log(f"OG poll error: {exc}")
-            for _ in range(self.poll_interval):
-                if self._stop.is_set():
-                    break
-                time.sleep(1)
+    def _poll_once(self) -> bool:
+        """Broadcast newly opened alerts; returns False if the poll failed."""
+        try:
+            resp = self._fetch_open_alerts()
+            if resp.status_code != 200:
+                self.log(f"OG poll error: HTTP {resp.status_code}")
+                return False
+            alerts = _json_loads(resp.content).get("data", [])
+            self._open_alerts = (time.monotonic(), alerts)
+            added = False
+            for a in alerts:
+                aid = a.get("id")
+                if aid and aid not in self._known_ids:
+                    self._known_ids[aid] = time.time() + _SEEN_TTL
+                    if len(self._known_ids) > 200:
+                        self._known_ids.popitem(last=False)
+                    added = True
+                    msg = a.get("message", "?")[:80]
+                    pri = a.get("priority", "?")
+                    tiny = a.get("tinyId", aid[:8])
+                    self.send_to_mesh(
+                        f"🚨 OG: [{pri}] {msg} (#{tiny})",
+                        channel_index=self.broadcast_channel,
+                    )
+            if added:
+                self._persist_seen()
+        except Exception as exc:
+            self.log(f"OG poll error: {exc}")
+            return False
+        return True
+
+    def _persist_seen(self) -> None:
+        try:
+            _save_seen(self._seen_path, self._known_ids)
+        except OSError as exc:
+            self.log(f"OG could not save seen alerts: {exc}")
@@ -15,23 +15,87 @@ Features:
 Authentication:
 - routing_key: Events API v2 integration key (for triggering).
 - api_token: REST API token (for ack/resolve/list — requires read/write).
+
+Keyword scanning uses ``pyahocorasick`` when installed, falling back to a
+single precompiled regex; ``orjson`` is used for JSON bodies when installed.
 """
 
+import collections
+import concurrent.futures
+import json
+import random
+import re
 import threading
 import time
-from datetime import datetime, timezone
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
+# Transport failures caught around HTTP calls (none without requests)
+_REQUEST_ERRORS = (requests.exceptions.RequestException,) if requests else ()
+_NO_REQUESTS = "⚠️ PagerDuty unavailable: 'requests' is not installed."
+
 from extensions.base_extension import BaseExtension
 
 
 EVENTS_URL = "https://events.pagerduty.com/v2/enqueue"
 API_BASE = "https://api.pagerduty.com"
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# Incident status updates never vary, so their bodies are encoded once
+_ACK_BODY = _json_dumps({"incident": {"type": "incident_reference",
+                                      "status": "acknowledged"}})
+_RESOLVE_BODY = _json_dumps({"incident": {"type": "incident_reference",
+                                          "status": "resolved"}})
+
+# Incident poll pacing (seconds): polls start fast, stretch by 1.3x per
+# quiet poll up to poll_interval, and double per failure up to _MAX_BACKOFF.
+_POLL_MIN = 5
+_QUIET_GROWTH = 1.3
+_MAX_BACKOFF = 3600
+
+# Identical triggers (same source and summary prefix) within this many
+# seconds are sent once; remembered triggers are pruned after _RECENT_KEEP.
+_DEDUP_WINDOW = 30
+_RECENT_KEEP = 120
+
+# A /pd status listing is reused for this many seconds
+_LIST_TTL = 15
+
+
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient send failures."""
+    session = requests.Session()
+    # Throttling and gateway errors are retried with backoff (and
+    # Retry-After); read errors and 500s are not, as the send may have landed.
+    retry = Retry(total=3, read=0, backoff_factor=0.3,
+                  status_forcelist=[429, 502, 503, 504],
+                  allowed_methods=["GET", "POST", "PUT"],
+                  respect_retry_after_header=True)
+    # One pool each for the Events API and REST API hosts
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=10, max_retries=retry)
+    session.mount("https://", adapter)
+    return session
+
 
 class PagerdutyExtension(BaseExtension):
     """PagerDuty incident management extension."""
@@ -101,9 +165,47 @@ class PagerdutyExtension(BaseExtension):
 
     # -- lifecycle --
     def on_load(self) -> None:
+        self._routing_key = self.routing_key
+        self._api_token = self.api_token
+        self._service_id = self.service_id
+        self._default_severity = self.default_severity
+        self._broadcast_channel = self.broadcast_channel
+        self._poll_interval = self.poll_interval
+        self._dedup_prefix = self.dedup_prefix
+        self._trigger_on_emergency = self.trigger_on_emergency
         self._poll_thread = None
         self._stop = threading.Event()
+        # Known incident IDs with FIFO eviction: the deque remembers
+        # insertion order, the set gives O(1) membership.
         self._known_incidents: set = set()
+        self._known_order: collections.deque = collections.deque(maxlen=200)
+        # (monotonic time, text) of the last /pd status listing
+        self._list_cache: tuple[float, str] = (0.0, "")
+        self._recent_trigger: dict[str, float] = {}
+        self._recent_lock = threading.Lock()
+        self._rest_headers = {
+            "Authorization": f"Token token={self._api_token}",
+            "Content-Type": "application/json",
+            "Accept": "application/vnd.pagerduty+json;version=2",
+        }
+
+        # Match all trigger keywords in one case-insensitive pass
+        self._kw_by_upper = {kw.upper(): kw for kw in self.trigger_keywords}
+        self._kw_ac = None
+        self._kw_re = None
+        if self._kw_by_upper:
+            if ahocorasick is not None:
+                self._kw_ac = ahocorasick.Automaton()
+                for upper, kw in self._kw_by_upper.items():
+                    self._kw_ac.add_word(upper, kw)
+                self._kw_ac.make_automaton()
+            else:
+                self._kw_re = re.compile("|".join(map(re.escape, self._kw_by_upper)))
+        self._session = _make_session() if requests else None
+        # Emergency/keyword triggers are sent from here so the mesh
+        # handler never waits on PagerDuty (the thread starts on first use)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="pd-send")
 
         info = []
         if self.routing_key:
@@ -112,7 +214,7 @@ class PagerdutyExtension(BaseExtension):
             info.append("api_token=set")
         self.log(f"PagerDuty enabled. {', '.join(info) if info else 'No keys set.'}")
 
-        if self.poll_incidents and self.api_token:
+        if self.poll_incidents and self.api_token and self._session is not None:
             self._poll_thread = threading.Thread(
                 target=self._poll_loop, daemon=True, name="pd-poll")
             self._poll_thread.start()
@@ -121,20 +223,24 @@ class PagerdutyExtension(BaseExtension):
         self._stop.set()
         if self._poll_thread and self._poll_thread.is_alive():
             self._poll_thread.join(timeout=10)
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("PagerDuty extension unloaded.")
 
     # -- commands --
     def handle_command(self, command: str, args: str, node_info: dict) -> str | None:
         if command != "/pd":
             return None
-        parts = args.strip().split(None, 1) if args.strip() else []
+        # str.split() of an empty string is already [], so strip once
+        parts = args.strip().split(None, 1)
         sub = parts[0].lower() if parts else "status"
         rest = parts[1] if len(parts) > 1 else ""
 
         if sub == "trigger":
             if not rest:
                 return "Usage: /pd trigger <summary>"
-            return self._trigger(rest, "mesh-manual", self.default_severity)
+            return self._trigger(rest, "mesh-manual", self._default_severity)
         if sub == "ack":
             return self._ack(rest.strip())
         if sub == "resolve":
@@ -145,143 +251,243 @@ class PagerdutyExtension(BaseExtension):
 
     # -- hooks --
     def on_emergency(self, message: str, gps_coords: dict | None = None) -> None:
-        if not self.trigger_on_emergency or not self.routing_key:
+        if not self._trigger_on_emergency or not self._routing_key:
             return
-        summary = f"MESH EMERGENCY: {message}"
         if gps_coords:
-            summary += f" (GPS: {gps_coords.get('lat','?')},{gps_coords.get('lon','?')})"
-        self._trigger(summary, "mesh-emergency", "critical")
+            summary = (f"MESH EMERGENCY: {message} "
+                       f"(GPS: {gps_coords.get('lat','?')},{gps_coords.get('lon','?')})")
+        else:
+            summary = f"MESH EMERGENCY: {message}"
+        self._submit_trigger(summary, "mesh-emergency", "critical")
 
     def on_message(self, message: str, node_info: dict) -> None:
-        if not self.routing_key or not self.trigger_keywords:
+        if not self._routing_key or not self._kw_by_upper:
             return
-        upper = message.upper()
-        for kw in self.trigger_keywords:
-            if kw.upper() in upper:
-                sender = node_info.get("shortname", "?")
-                self._trigger(
-                    f"Keyword '{kw}' from {sender}: {message[:200]}",
-                    f"mesh-kw-{kw.lower()}",
-                    self.default_severity,
-                )
-                break
+        kw = self._match_keyword(message.upper())
+        if kw is None:
+            return
+        sender = node_info.get("shortname", "?")
+        self._submit_trigger(
+            f"Keyword '{kw}' from {sender}: {message[:200]}",
+            f"mesh-kw-{kw.lower()}",
+            self._default_severity,
+        )
+
+    def _submit_trigger(self, summary: str, source: str, severity: str) -> None:
+        """Trigger an incident on the send thread, logging how it went."""
+        future = self._executor.submit(self._trigger, summary, source, severity)
+        future.add_done_callback(self._log_trigger)
+
+    def _log_trigger(self, future: concurrent.futures.Future) -> None:
+        """Log a failed background trigger; nobody else sees its result."""
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            self.log(f"⚠️ PagerDuty trigger error: {exc!r}")
+        elif future.result().startswith("⚠️"):
+            self.log(future.result())
+
+    def _match_keyword(self, upper: str) -> str | None:
+        """Return the configured keyword found in *upper*, if any."""
+        if self._kw_ac is not None:
+            for _, kw in self._kw_ac.iter(upper):
+                return kw
+            return None
+        m = self._kw_re.search(upper)
+        return self._kw_by_upper.get(m.group(0)) if m else None
 
     # -- Events API v2 --
     def _trigger(self, summary: str, source: str, severity: str) -> str:
-        if not self.routing_key:
+        if not self._routing_key:
             return "No routing key configured."
+        if self._session is None:
+            return _NO_REQUESTS
+        now = time.time()
+        # An operator's explicit /pd trigger is always sent
+        key = None if source == "mesh-manual" else f"{source}-{summary[:64]}"
+        if key is not None and self._is_duplicate(key, now):
+            return "PagerDuty trigger deduplicated (sent in the last 30s)."
+        sent = False
         try:
-            dedup = f"{self.dedup_prefix}-{source}-{int(time.time())}"
+            dedup = f"{self._dedup_prefix}-{source}-{int(now)}"
             payload = {
-                "routing_key": self.routing_key,
+                "routing_key": self._routing_key,
                 "event_action": "trigger",
                 "dedup_key": dedup,
                 "payload": {
                     "summary": summary[:1024],
                     "source": source,
                     "severity": severity,
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)),
                     "component": "mesh-api",
                     "group": "meshtastic",
                 },
             }
-            resp = requests.post(EVENTS_URL, json=payload, timeout=10)
+            resp = self._session.post(EVENTS_URL, data=_json_dumps(payload),
+                                      headers=_JSON_HEADERS, timeout=10)
             if resp.status_code in (200, 201, 202):
-                data = resp.json()
+                sent = True
+                data = _json_loads(resp.content)
                 self.log(f"PD incident triggered: {data.get('dedup_key', dedup)}")
                 return f"🚨 PagerDuty incident triggered ({severity})."
             return f"⚠️ PagerDuty trigger failed: {resp.status_code} {resp.text[:100]}"
-        except Exception as exc:
+        except _REQUEST_ERRORS as exc:
             return f"⚠️ PagerDuty error: {exc}"
+        except ValueError as exc:
+            return f"⚠️ PagerDuty sent an invalid response: {exc}"
+        finally:
+            # A failed trigger must not block its own retry
+            if key is not None and not sent:
+                self._forget_trigger(key, now)
+
+    def _is_duplicate(self, key: str, now: float) -> bool:
+        """Record a trigger for *key*; True if one was sent within the window."""
+        with self._recent_lock:
+            if self._recent_trigger.get(key, 0) > now - _DEDUP_WINDOW:
+                return True
+            self._recent_trigger[key] = now
+            if len(self._recent_trigger) > 32:
+                cutoff = now - _RECENT_KEEP
+                self._recent_trigger = {k: t for k, t in self._recent_trigger.items()
+                                        if t > cutoff}
+        return False
+
+    def _forget_trigger(self, key: str, now: float) -> None:
+        """Drop the record _is_duplicate made for *key* at *now*."""
+        with self._recent_lock:
+            if self._recent_trigger.get(key) == now:
+                del self._recent_trigger[key]
 
     # -- REST API --
     def _api_headers(self) -> dict:
-        return {
-            "Authorization": f"Token token={self.api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/vnd.pagerduty+json;version=2",
-        }
+        # Built in on_load; kept off the shared session so the REST token
+        # is never sent to the Events API host.
+        return self._rest_headers
 
     def _ack(self, incident_id: str) -> str:
         if not incident_id:
             return "Usage: /pd ack <incident_id>"
-        if not self.api_token:
+        if not self._api_token:
             return "No API token configured."
+        if self._session is None:
+            return _NO_REQUESTS
         try:
             url = f"{API_BASE}/incidents/{incident_id}"
-            payload = {"incident": {"type": "incident_reference", "status": "acknowledged"}}
-            resp = requests.put(url, json=payload, headers=self._api_headers(), timeout=10)
+            resp = self._session.put(url, data=_ACK_BODY, headers=self._api_headers(),
+                                     timeout=10)
             if resp.status_code == 200:
+                self._list_cache = (0.0, "")
                 return f"✅ Incident {incident_id} acknowledged."
             return f"⚠️ Ack failed: {resp.status_code}"
-        except Exception as exc:
+        except _REQUEST_ERRORS as exc:
             return f"⚠️ PD ack error: {exc}"
 
     def _resolve(self, incident_id: str) -> str:
         if not incident_id:
             return "Usage: /pd resolve <incident_id>"
-        if not self.api_token:
+        if not self._api_token:
             return "No API token configured."
+        if self._session is None:
+            return _NO_REQUESTS
         try:
             url = f"{API_BASE}/incidents/{incident_id}"
-            payload = {"incident": {"type": "incident_reference", "status": "resolved"}}
-            resp = requests.put(url, json=payload, headers=self._api_headers(), timeout=10)
+            resp = self._session.put(url, data=_RESOLVE_BODY, headers=self._api_headers(),
+                                     timeout=10)
             if resp.status_code == 200:
+                self._list_cache = (0.0, "")
                 return f"✅ Incident {incident_id} resolved."
             return f"⚠️ Resolve failed: {resp.status_code}"
-        except Exception as exc:
+        except _REQUEST_ERRORS as exc:
             return f"⚠️ PD resolve error: {exc}"
 
     def _list_incidents(self) -> str:
-        if not self.api_token:
+        if not self._api_token:
             return "No API token configured."
+        if self._session is None:
+            return _NO_REQUESTS
+        cached_at, cached_text = self._list_cache
+        if cached_text and time.monotonic() - cached_at < _LIST_TTL:
+            return cached_text
         try:
             params = {"statuses[]": ["triggered", "acknowledged"], "limit": 10}
-            if self.service_id:
-                params["service_ids[]"] = [self.service_id]
-            resp = requests.get(f"{API_BASE}/incidents", params=params,
-                                headers=self._api_headers(), timeout=10)
+            if self._service_id:
+                params["service_ids[]"] = [self._service_id]
+            resp = self._session.get(f"{API_BASE}/incidents", params=params,
+                                     headers=self._api_headers(), timeout=10)
             if resp.status_code != 200:
                 return f"⚠️ PD API error: {resp.status_code}"
-            data = resp.json()
+            data = _json_loads(resp.content)
             incidents = data.get("incidents", [])
             if not incidents:
-                return "✅ No open PagerDuty incidents."
-            lines = [f"🚨 Open Incidents ({len(incidents)}):"]
-            for inc in incidents[:8]:
-                iid = inc.get("id", "?")
-                status = inc.get("status", "?")
-                title = inc.get("title", inc.get("summary", "?"))[:60]
-                lines.append(f"  [{iid}] {status}: {title}")
-            return "\n".join(lines)
-        except Exception as exc:
+                text = "✅ No open PagerDuty incidents."
+            else:
+                lines = [f"🚨 Open Incidents ({len(incidents)}):"]
+                for inc in incidents[:8]:
+                    iid = inc.get("id", "?")
+                    status = inc.get("status", "?")
+                    title = inc.get("title", inc.get("summary", "?"))[:60]
+                    lines.append(f"  [{iid}] {status}: {title}")
+                text = "\n".join(lines)
+            self._list_cache = (time.monotonic(), text)
+            return text
+        except _REQUEST_ERRORS as exc:
             return f"⚠️ PD list error: {exc}"
+        except ValueError as exc:
+            return f"⚠️ PD list error: invalid response ({exc})"
 
     # -- polling --
     def _poll_loop(self) -> None:
-        time.sleep(15)
+        delay = _POLL_MIN
+        if self._stop.wait(delay):
+            return
         while not self._stop.is_set():
             try:
                 params = {"statuses[]": ["triggered"], "limit": 5}
-                if self.service_id:
-                    params["service_ids[]"] = [self.service_id]
-                resp = requests.get(f"{API_BASE}/incidents", params=params,
-                                    headers=self._api_headers(), timeout=10)
-                if resp.status_code == 200:
-                    for inc in resp.json().get("incidents", []):
+                if self._service_id:
+                    params["service_ids[]"] = [self._service_id]
+                resp = self._session.get(f"{API_BASE}/incidents", params=params,
+                                         headers=self._api_headers(), timeout=10)
+                if resp.status_code != 200:
+                    delay = self._failed_delay(delay)
+                    self.log(f"PD poll error: HTTP {resp.status_code}")
+                else:
+                    found_new = False
+                    for inc in _json_loads(resp.content).get("incidents", []):
                         iid = inc.get("id")
                         if iid and iid not in self._known_incidents:
-                            self._known_incidents.add(iid)
+                            self._remember(iid)
+                            found_new = True
                             title = inc.get("title", "?")[:80]
                             self.send_to_mesh(
                                 f"🚨 PD Alert: {title} [{iid}]",
-                                channel_index=self.broadcast_channel,
+                                channel_index=self._broadcast_channel,
                             )
-                if len(self._known_incidents) > 200:
-                    self._known_incidents = set(list(self._known_incidents)[-100:])
-            except Exception as exc:
+                    # Poll quickly while incidents are arriving, then relax
+                    # towards the configured interval once things go quiet
+                    if found_new:
+                        delay = _POLL_MIN
+                    else:
+                        delay = min(max(delay, _POLL_MIN) * _QUIET_GROWTH,
+                                    max(self._poll_interval, _POLL_MIN))
+            except (*_REQUEST_ERRORS, ValueError) as exc:
+                delay = self._failed_delay(delay)
                 self.log(f"PD poll error: {exc}")
-            for _ in range(self.poll_interval):
-                if self._stop.is_set():
-                    break
-                time.sleep(1)
+            except Exception as exc:
+                # Anything else is a bug, but must not kill the poller
+                delay = self._failed_delay(delay)
+                self.log(f"PD poll unexpected error: {exc!r}")
+            if self._stop.wait(delay):
+                break
+
+    @staticmethod
+    def _failed_delay(delay: float) -> float:
+        """Double the poll delay after a failure (capped, with jitter)."""
+        return min(delay * 2 + random.uniform(0, 5), _MAX_BACKOFF)
+
+    def _remember(self, incident_id: str) -> None:
+        """Mark *incident_id* as known, evicting the oldest ID once full."""
+        if len(self._known_order) == self._known_order.maxlen:
+            self._known_incidents.discard(self._known_order[0])
+        self._known_order.append(incident_id)
+        self._known_incidents.add(incident_id)
@@ -11,14 +11,35 @@ with retry/expire acknowledgement.
 Requires a Pushover Application API Token and a User Key.
 """
 
+import concurrent.futures
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
+# Transport failures caught around HTTP calls (none without requests)
+_REQUEST_ERRORS = (requests.exceptions.RequestException,) if requests else ()
+
 from extensions.base_extension import BaseExtension
 
 
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient send failures."""
+    session = requests.Session()
+    # Throttling and gateway errors are retried with backoff (and
+    # Retry-After); read errors and 500s are not, as the send may have landed.
+    retry = Retry(total=3, read=0, backoff_factor=0.3,
+                  status_forcelist=[429, 502, 503, 504],
+                  allowed_methods=["GET", "POST", "PUT"],
+                  respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+    session.mount("https://", adapter)
+    return session
+
+
 class PushoverExtension(BaseExtension):
     """Pushover push notification extension."""
 
@@ -94,6 +115,35 @@ class PushoverExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        self._api_token = self.api_token
+        self._user_key = self.user_key
+        self._device = self.device
+        self._send_emergency = self.send_emergency
+        self._send_ai = self.send_ai
+        self._send_all = self.send_all
+        self._inbound_channel_index = self.inbound_channel_index
+        self._priority = self.priority
+        self._emergency_priority = self.emergency_priority
+        self._emergency_retry = self.emergency_retry
+        self._emergency_expire = self.emergency_expire
+        self._sound = self.sound
+        # Fields shared by every notification, copied per push
+        self._base_payload = {
+            "token": self._api_token,
+            "user": self._user_key,
+            "sound": self._sound,
+        }
+        if self._device:
+            self._base_payload["device"] = self._device
+        # One kept-alive HTTPS connection to api.pushover.net is reused
+        # for every notification instead of a fresh TLS handshake each.
+        self._session = _make_session() if requests else None
+        if requests is None:
+            self.log("⚠️ 'requests' library is not installed — Pushover extension cannot function.")
+        # Notifications are delivered from here so mesh hooks never wait on
+        # the Pushover API (the thread starts on first use)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="pushover-send")
         status = []
         if self.api_token:
             status.append("token=set")
@@ -104,6 +154,9 @@ class PushoverExtension(BaseExtension):
         self.log(f"Pushover enabled. {', '.join(status) if status else 'No settings configured.'}")
 
     def on_unload(self) -> None:
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("Pushover extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -115,21 +168,21 @@ class PushoverExtension(BaseExtension):
         is_ai = metadata.get("is_ai_response", False)
         ch_idx = metadata.get("channel_idx")
 
-        if self.send_all and not is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if self._send_all and not is_ai:
+            if self._inbound_channel_index is not None and ch_idx == self._inbound_channel_index:
                 self._push(message, title="Mesh Message")
             return
 
-        if self.send_ai and is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if self._send_ai and is_ai:
+            if self._inbound_channel_index is not None and ch_idx == self._inbound_channel_index:
                 self._push(message, title="AI Response")
 
     def on_message(self, message: str, metadata: dict | None = None) -> None:
-        if not self.send_all:
+        if not self._send_all:
             return
         metadata = metadata or {}
         ch_idx = metadata.get("channel_idx")
-        if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if self._inbound_channel_index is not None and ch_idx == self._inbound_channel_index:
             sender = metadata.get("sender_info", "Unknown")
             self._push(f"{sender}: {message}", title="Mesh Message")
 
@@ -138,7 +191,7 @@ class PushoverExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_emergency(self, message: str, gps_coords: dict | None = None) -> None:
-        if self.send_emergency:
+        if self._send_emergency:
             try:
                 body = message
                 if gps_coords:
@@ -146,9 +199,9 @@ class PushoverExtension(BaseExtension):
                     lon = gps_coords.get("lon", "?")
                     body += f"\nGPS: {lat}, {lon}"
                 self._push(body, title="EMERGENCY ALERT",
-                           priority=self.emergency_priority,
+                           priority=self._emergency_priority,
                            sound="siren")
-                self.log("✅ Emergency alert sent via Pushover.")
+                self.log("✅ Emergency alert queued for Pushover.")
             except Exception as exc:
                 self.log(f"⚠️ Pushover emergency error: {exc}")
 
@@ -159,28 +212,36 @@ class PushoverExtension(BaseExtension):
     def _push(self, message: str, title: str = "MESH-API",
               priority: int | None = None,
               sound: str | None = None) -> None:
-        """Send a push notification via Pushover API."""
-        if not self.api_token or not self.user_key:
+        """Queue a push notification for background delivery."""
+        if not self._api_token or not self._user_key or self._session is None:
             return
+        future = self._executor.submit(self._deliver, message, title,
+                                       priority, sound)
+        future.add_done_callback(self._log_send_error)
+
+    def _log_send_error(self, future: concurrent.futures.Future) -> None:
+        """Log an error _deliver did not expect; the executor would drop it."""
+        if not future.cancelled() and future.exception() is not None:
+            self.log(f"⚠️ Pushover send error: {future.exception()!r}")
+
+    def _deliver(self, message: str, title: str, priority: int | None,
+                 sound: str | None) -> None:
+        """Send a push notification via Pushover API."""
         try:
-            prio = priority if priority is not None else self.priority
-            payload = {
-                "token": self.api_token,
-                "user": self.user_key,
-                "message": message,
-                "title": title,
-                "priority": prio,
-                "sound": sound or self.sound,
-            }
-            if self.device:
-                payload["device"] = self.device
+            prio = priority if priority is not None else self._priority
+            payload = self._base_payload.copy()
+            payload["message"] = message
+            payload["title"] = title
+            payload["priority"] = prio
+            if sound:
+                payload["sound"] = sound
             # Emergency priority requires retry and expire
             if prio == 2:
-                payload["retry"] = self.emergency_retry
-                payload["expire"] = self.emergency_expire
+                payload["retry"] = self._emergency_retry
+                payload["expire"] = self._emergency_expire
 
-            resp = requests.post(self.PUSHOVER_API, data=payload, timeout=10)
+            resp = self._session.post(self.PUSHOVER_API, data=payload, timeout=10)
             if resp.status_code != 200:
                 self.log(f"Pushover API error: {resp.status_code} {resp.text}")
-        except Exception as exc:
+        except _REQUEST_ERRORS as exc:
             self.log(f"⚠️ Pushover send error: {exc}")
@@ -10,20 +10,50 @@ Provides bidirectional Signal ↔ Mesh integration via the signal-cli-rest-api
 - Emergency: sends emergency alerts to the configured recipient.
 
 Requires a running signal-cli-rest-api instance and a registered Signal
-number.
+number.  Received batches are stream-parsed with ``ijson`` when installed.
 """
 
+import concurrent.futures
 import threading
 import time
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Errors raised for a malformed receive body by either decoder
+_JSON_ERRORS = (ValueError,) if ijson is None else (ValueError, ijson.JSONError)
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
+# Transport failures caught around HTTP calls (none without requests)
+_REQUEST_ERRORS = (requests.exceptions.RequestException,) if requests else ()
+
 from extensions.base_extension import BaseExtension
 
 
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient send failures."""
+    session = requests.Session()
+    # Throttling and gateway errors are retried with backoff (and
+    # Retry-After); read errors and 500s are not, as the send may have landed.
+    retry = Retry(total=3, read=0, backoff_factor=0.3,
+                  status_forcelist=[429, 502, 503, 504],
+                  allowed_methods=["GET", "POST", "PUT"],
+                  respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+    # signal-cli-rest-api usually runs locally over plain HTTP
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 class SignalExtension(BaseExtension):
     """Signal ↔ Mesh bridge extension."""
 
@@ -87,8 +117,25 @@ class SignalExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        self._api_url = self.api_url
+        self._sender_number = self.sender_number
+        self._recipient = self.recipient
+        self._send_emergency = self.send_emergency
+        self._send_ai = self.send_ai
+        self._send_all = self.send_all
+        self._inbound_channel_index = self.inbound_channel_index
+        self._poll_interval = self.poll_interval
         self._poll_thread = None
         self._stop_event = threading.Event()
+        # The poll loop and outbound sends share kept-alive connections to
+        # the signal-cli-rest-api instead of opening a socket per request.
+        self._session = _make_session() if requests else None
+        if requests is None:
+            self.log("⚠️ 'requests' library is not installed — Signal extension cannot function.")
+        # Outbound sends run here so mesh hooks never wait on the REST API
+        # (the thread starts on first use)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="signal-send")
 
         status = []
         if self.sender_number:
@@ -100,7 +147,8 @@ class SignalExtension(BaseExtension):
 
         self.log(f"Signal enabled. {', '.join(status) if status else 'No settings configured.'}")
 
-        if self.api_url and self.sender_number and self.receive_enabled:
+        if (self.api_url and self.sender_number and self.receive_enabled
+                and self._session is not None):
             self._poll_thread = threading.Thread(
                 target=self._poll_signal,
                 daemon=True,
@@ -113,6 +161,9 @@ class SignalExtension(BaseExtension):
         self._stop_event.set()
         if self._poll_thread and self._poll_thread.is_alive():
             self._poll_thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("Signal extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -124,21 +175,21 @@ class SignalExtension(BaseExtension):
         is_ai = metadata.get("is_ai_response", False)
         ch_idx = metadata.get("channel_idx")
 
-        if self.send_all and not is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if self._send_all and not is_ai:
+            if self._inbound_channel_index is not None and ch_idx == self._inbound_channel_index:
                 self._send_signal(message)
             return
 
-        if self.send_ai and is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if self._send_ai and is_ai:
+            if self._inbound_channel_index is not None and ch_idx == self._inbound_channel_index:
                 self._send_signal(message)
 
     def on_message(self, message: str, metadata: dict | None = None) -> None:
-        if not self.send_all:
+        if not self._send_all:
             return
         metadata = metadata or {}
         ch_idx = metadata.get("channel_idx")
-        if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if self._inbound_channel_index is not None and ch_idx == self._inbound_channel_index:
             sender = metadata.get("sender_info", "Unknown")
             self._send_signal(f"{sender}: {message}")
 
@@ -147,10 +198,10 @@ class SignalExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_emergency(self, message: str, gps_coords: dict | None = None) -> None:
-        if self.send_emergency:
+        if self._send_emergency:
             try:
                 self._send_signal(f"🚨 EMERGENCY ALERT\n{message}")
-                self.log("✅ Emergency alert sent via Signal.")
+                self.log("✅ Emergency alert queued for Signal.")
             except Exception as exc:
                 self.log(f"⚠️ Signal emergency error: {exc}")
 
@@ -159,59 +210,112 @@ class SignalExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def _poll_signal(self) -> None:
-        time.sleep(5)
+        if self._stop_event.wait(5):
+            return
 
+        # Long-poll: signal-cli-rest-api holds the receive request open for
+        # up to poll_interval seconds, so an idle bridge issues about one
+        # request per interval and the next one goes out right away.
+        url = f"{self._api_url}/v1/receive/{self._sender_number}"
+        params = {"timeout": self._poll_interval}
+        fail_count = 0
         while not self._stop_event.is_set():
+            delay = 0.0
+            started = time.monotonic()
             try:
-                url = f"{self.api_url}/v1/receive/{self.sender_number}"
-                resp = requests.get(url, timeout=10)
-                if resp.status_code == 200:
-                    messages = resp.json()
-                    if not isinstance(messages, list):
-                        messages = []
-                    for msg in messages:
-                        envelope = msg.get("envelope", {})
-                        data_msg = envelope.get("dataMessage")
-                        if not data_msg:
-                            continue
-                        text = data_msg.get("message", "")
-                        source = envelope.get("sourceName") or envelope.get("sourceNumber", "SignalUser")
-                        if not text:
-                            continue
-
-                        formatted = f"[Signal:{source}] {text}"
-                        log_fn = self.app_context.get("log_message")
-                        if log_fn:
-                            log_fn("Signal", formatted, direct=False,
-                                   channel_idx=self.inbound_channel_index)
-                        if self.inbound_channel_index is not None:
-                            self.send_to_mesh(formatted,
-                                              channel_index=self.inbound_channel_index)
-                        self.log(f"Polled Signal message: {formatted}")
-                else:
-                    self.log(f"Signal API error: {resp.status_code}")
-            except Exception as exc:
+                with self._session.get(url, params=params, stream=True,
+                                       timeout=self._poll_interval + 5) as resp:
+                    if resp.status_code == 200:
+                        fail_count = 0
+                        received = 0
+                        for msg in self._iter_messages(resp):
+                            received += 1
+                            self._relay_inbound(msg)
+                        if not received:
+                            # Older API versions ignore ``timeout`` and answer
+                            # at once; keep the interval rather than spinning
+                            delay = self._poll_interval - (time.monotonic() - started)
+                    else:
+                        fail_count += 1
+                        delay = min(60, 2 ** fail_count)
+                        self.log(f"Signal API error: {resp.status_code}")
+            except (*_REQUEST_ERRORS, *_JSON_ERRORS) as exc:
+                fail_count += 1
+                delay = min(60, 2 ** fail_count)
                 self.log(f"Error polling Signal: {exc}")
-            for _ in range(self.poll_interval):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(1)
+            except Exception as exc:
+                # Anything else is a bug, but must not kill the poller
+                fail_count += 1
+                delay = min(60, 2 ** fail_count)
+                self.log(f"Unexpected error polling Signal: {exc!r}")
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+    @staticmethod
+    def _iter_messages(resp):
+        """Yield received envelopes from a streamed receive response.
+
+        With ``ijson`` installed the JSON array is parsed incrementally,
+        so a large backlog is relayed as it is read instead of being
+        materialised in memory first.
+        """
+        if ijson is not None:
+            resp.raw.decode_content = True
+            yield from ijson.items(resp.raw, "item")
+            return
+        messages = resp.json()
+        if isinstance(messages, list):
+            yield from messages
+
+    def _relay_inbound(self, msg: dict) -> None:
+        """Route one received Signal envelope onto the mesh."""
+        if not isinstance(msg, dict):
+            return
+        envelope = msg.get("envelope", {})
+        data_msg = envelope.get("dataMessage")
+        if not data_msg:
+            return
+        text = data_msg.get("message", "")
+        source = envelope.get("sourceName") or envelope.get("sourceNumber", "SignalUser")
+        if not text:
+            return
+
+        formatted = f"[Signal:{source}] {text}"
+        log_fn = self.app_context.get("log_message")
+        if log_fn:
+            log_fn("Signal", formatted, direct=False,
+                   channel_idx=self._inbound_channel_index)
+        if self._inbound_channel_index is not None:
+            self.send_to_mesh(formatted,
+                              channel_index=self._inbound_channel_index)
+        self.log(f"Polled Signal message: {formatted}")
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
     def _send_signal(self, text: str) -> None:
-        """Send a message via the signal-cli-rest-api."""
-        if not self.api_url or not self.sender_number or not self.recipient:
+        """Queue a message for background delivery to Signal."""
+        if (not self._api_url or not self._sender_number or not self._recipient
+                or self._session is None):
             return
-        url = f"{self.api_url}/v2/send"
+        future = self._executor.submit(self._post_signal, text)
+        future.add_done_callback(self._log_send_error)
+
+    def _log_send_error(self, future: concurrent.futures.Future) -> None:
+        """Log an error _post_signal did not expect; the executor would drop it."""
+        if not future.cancelled() and future.exception() is not None:
+            self.log(f"⚠️ Signal send error: {future.exception()!r}")
+
+    def _post_signal(self, text: str) -> None:
+        """Send a message via the signal-cli-rest-api."""
+        url = f"{self._api_url}/v2/send"
         payload = {
             "message": text,
-            "number": self.sender_number,
-            "recipients": [self.recipient],
+            "number": self._sender_number,
+            "recipients": [self._recipient],
         }
         try:
-            requests.post(url, json=payload, timeout=10)
-        except Exception as exc:
+            self._session.post(url, json=payload, timeout=10)
+        except _REQUEST_ERRORS as exc:
             self.log(f"⚠️ Signal send error: {exc}")
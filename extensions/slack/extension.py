@@ -11,18 +11,47 @@ Provides bidirectional Slack ↔ Mesh integration:
 Configuration lives in this extension's own config.json.
 """
 
+import concurrent.futures
+import json
 import threading
-import time
 from datetime import datetime, timezone
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
 from extensions.base_extension import BaseExtension
 
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Longest pause between polls while Slack keeps failing
+_MAX_BACKOFF = 600
+
+
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient API failures."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3,
+                  status_forcelist=(429, 500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4,
+                                          max_retries=retry))
+    return session
+
+
 class SlackExtension(BaseExtension):
     """Slack ↔ Mesh bridge extension."""
 
@@ -84,9 +113,32 @@ class SlackExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        self._send_emergency = self.send_emergency
+        self._send_ai = self.send_ai
+        self._send_all = self.send_all
+        self._inbound_channel_index = self.inbound_channel_index
+        self._poll_interval = self.poll_interval
+        self._webhook_url = self.webhook_url
+        self._bot_token = self.bot_token
+        self._channel_id = self.channel_id
+        # send_message can only forward anything when this holds
+        self._relay_out = ((self._send_all or self._send_ai)
+                           and self._inbound_channel_index is not None)
         self._poll_thread = None
         self._stop_event = threading.Event()
         self._last_ts = None
+        self._session = _make_session() if requests else None
+        # Mesh sends are queued here so a slow radio does not hold up polling
+        self._tx = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="slack-tx")
+        # Request invariants, built once; only oldest/cursor change per poll
+        self._slack_headers = {"Authorization": f"Bearer {self.bot_token}"}
+        self._post_headers = {
+            **self._slack_headers,
+            "Content-Type": "application/json; charset=utf-8",
+        }
+        self._slack_url = "https://slack.com/api/conversations.history"
+        self._slack_params = {"channel": self.channel_id, "limit": 200}
 
         status = []
         if self.webhook_url:
@@ -111,6 +163,9 @@ class SlackExtension(BaseExtension):
         self._stop_event.set()
         if self._poll_thread and self._poll_thread.is_alive():
             self._poll_thread.join(timeout=5)
+        self._tx.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("Slack extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -118,25 +173,23 @@ class SlackExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def send_message(self, message: str, metadata: dict | None = None) -> None:
+        if not self._relay_out:
+            return
         metadata = metadata or {}
         is_ai = metadata.get("is_ai_response", False)
         ch_idx = metadata.get("channel_idx")
 
-        if self.send_all and not is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
-                self._post(message)
+        if ch_idx != self._inbound_channel_index:
             return
-
-        if self.send_ai and is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
-                self._post(message)
+        if self._send_ai if is_ai else self._send_all:
+            self._post(message)
 
     def on_message(self, message: str, metadata: dict | None = None) -> None:
-        if not self.send_all:
+        if not self._send_all or self._inbound_channel_index is None:
             return
         metadata = metadata or {}
         ch_idx = metadata.get("channel_idx")
-        if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if ch_idx == self._inbound_channel_index:
             sender = metadata.get("sender_info", "Unknown")
             self._post(f"*{sender}*: {message}")
 
@@ -145,7 +198,7 @@ class SlackExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_emergency(self, message: str, gps_coords: dict | None = None) -> None:
-        if self.send_emergency:
+        if self._send_emergency:
             try:
                 self._post(f"🚨 *EMERGENCY ALERT*\n{message}")
                 self.log("✅ Emergency alert posted to Slack.")
@@ -157,67 +210,96 @@ class SlackExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def _poll_slack(self) -> None:
-        time.sleep(5)
-        headers = {"Authorization": f"Bearer {self.bot_token}"}
-        url = "https://slack.com/api/conversations.history"
+        if self._stop_event.wait(5):
+            return
         start_ts = str(datetime.now(timezone.utc).timestamp())
         self._last_ts = start_ts
+        delay = self._poll_interval
 
         while not self._stop_event.is_set():
+            msgs = None
             try:
-                params = {"channel": self.channel_id, "limit": 20}
-                if self._last_ts:
-                    params["oldest"] = self._last_ts
-                resp = requests.get(url, headers=headers, params=params)
-                data = resp.json()
-                if data.get("ok"):
-                    msgs = data.get("messages", [])
-                    msgs.sort(key=lambda m: float(m.get("ts", 0)))
-                    for msg in msgs:
-                        if msg.get("subtype"):
-                            continue  # skip bot messages, joins, etc.
-                        user = msg.get("user", "SlackUser")
-                        text = msg.get("text", "")
-                        ts = msg.get("ts", "")
-                        if not text:
-                            continue
-                        formatted = f"[Slack:{user}] {text}"
-                        log_fn = self.app_context.get("log_message")
-                        if log_fn:
-                            log_fn("Slack", formatted, direct=False,
-                                   channel_idx=self.inbound_channel_index)
-                        if self.inbound_channel_index is not None:
-                            self.send_to_mesh(formatted,
-                                              channel_index=self.inbound_channel_index)
-                        self.log(f"Polled Slack message: {formatted}")
-                        self._last_ts = ts
-                else:
-                    self.log(f"Slack API error: {data.get('error', 'unknown')}")
+                msgs = self._fetch_history()
+                # Slack returns newest-first; walk the drained backlog
+                # oldest-first so the mesh sees messages in order.
+                for msg in reversed(msgs or ()):
+                    if msg.get("subtype"):
+                        continue  # skip bot messages, joins, etc.
+                    user = msg.get("user", "SlackUser")
+                    text = msg.get("text", "")
+                    if not text:
+                        continue
+                    formatted = f"[Slack:{user}] {text}"
+                    log_fn = self.app_context.get("log_message")
+                    if log_fn:
+                        log_fn("Slack", formatted, direct=False,
+                               channel_idx=self._inbound_channel_index)
+                    if self._inbound_channel_index is not None:
+                        self._tx.submit(self._mesh_send, formatted,
+                                        self._inbound_channel_index)
+                    self.log(f"Polled Slack message: {formatted}")
+                if msgs:
+                    self._last_ts = msgs[0].get("ts") or self._last_ts
             except Exception as exc:
                 self.log(f"Error polling Slack: {exc}")
-            for _ in range(self.poll_interval):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(1)
+            # Back off exponentially while Slack errors; reset on success
+            if msgs is None:
+                delay = min(delay * 2, _MAX_BACKOFF)
+            else:
+                delay = self._poll_interval
+            if self._stop_event.wait(timeout=delay):
+                break
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _mesh_send(self, text: str, channel_index: int) -> None:
+        """Send from the TX thread, logging errors the executor would swallow."""
+        try:
+            self.send_to_mesh(text, channel_index=channel_index)
+        except Exception as exc:
+            self.log(f"⚠️ Mesh send error: {exc}")
+
+    def _fetch_history(self) -> list | None:
+        """Return every message newer than ``_last_ts``, newest first.
+
+        Follows ``response_metadata.next_cursor`` while Slack reports
+        ``has_more`` so a burst larger than one page is not dropped.
+        Returns None on an API error so the cursor is left untouched.
+        """
+        params = self._slack_params
+        params.pop("cursor", None)
+        if self._last_ts:
+            params["oldest"] = self._last_ts
+        msgs: list = []
+        while True:
+            resp = self._session.get(self._slack_url,
+                                     headers=self._slack_headers,
+                                     params=params, timeout=15)
+            data = _json_loads(resp.content)
+            if not data.get("ok"):
+                self.log(f"Slack API error: {data.get('error', 'unknown')}")
+                return None
+            msgs.extend(data.get("messages", []))
+            cursor = (data.get("response_metadata") or {}).get("next_cursor")
+            if not data.get("has_more") or not cursor or self._stop_event.is_set():
+                return msgs
+            params["cursor"] = cursor
+
     def _post(self, text: str) -> None:
         """Post a message to Slack via webhook or Bot API."""
         try:
-            if self.webhook_url:
-                requests.post(self.webhook_url, json={"text": text})
-            elif self.bot_token and self.channel_id:
-                headers = {
-                    "Authorization": f"Bearer {self.bot_token}",
-                    "Content-Type": "application/json; charset=utf-8",
-                }
-                requests.post(
+            if self._webhook_url:
+                self._session.post(self._webhook_url,
+                                   data=_json_dumps({"text": text}),
+                                   headers=_JSON_HEADERS, timeout=10)
+            elif self._bot_token and self._channel_id:
+                self._session.post(
                     "https://slack.com/api/chat.postMessage",
-                    headers=headers,
-                    json={"channel": self.channel_id, "text": text},
+                    headers=self._post_headers,
+                    data=_json_dumps({"channel": self._channel_id, "text": text}),
+                    timeout=10,
                 )
         except Exception as exc:
             self.log(f"⚠️ Slack post error: {exc}")
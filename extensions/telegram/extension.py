@@ -4,25 +4,62 @@ Telegram extension for MESH-API.
 Provides bidirectional Telegram ↔ Mesh integration:
 - Outbound: sends mesh messages and AI responses to a Telegram chat via
   the Bot API (sendMessage).
-- Inbound:  polls Telegram for new messages using getUpdates and routes
-  them onto the mesh.
+- Inbound:  long-polls Telegram for new messages using getUpdates and routes
+  them onto the mesh.  When ``webhook_public_url`` is set (the public
+  HTTPS address of this server's ``/telegram_webhook`` route), Telegram
+  pushes updates there instead and no polling thread is started.
+  Pushes must carry ``webhook_secret``; one is generated when unset.
 - Emergency: posts emergency alerts to the configured chat.
 
 Requires a Telegram Bot Token from @BotFather and the numeric chat_id
 of the target group / user.
 """
 
+import concurrent.futures
+import hmac
+import json
+import secrets
 import threading
-import time
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
 from extensions.base_extension import BaseExtension
 
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Seconds Telegram may hold a getUpdates call open waiting for updates
+_LONG_POLL_TIMEOUT = 50
+
+# Longest pause between getUpdates calls while Telegram keeps failing
+_MAX_BACKOFF = 600
+
+
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient API failures."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3,
+                  status_forcelist=(429, 500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4,
+                                          max_retries=retry))
+    return session
+
+
 class TelegramExtension(BaseExtension):
     """Telegram ↔ Mesh bridge extension."""
 
@@ -75,14 +112,40 @@ class TelegramExtension(BaseExtension):
     def poll_interval(self) -> int:
         return int(self.config.get("poll_interval_seconds", 5))
 
+    @property
+    def webhook_public_url(self) -> str:
+        return self.config.get("webhook_public_url", "")
+
+    @property
+    def webhook_secret(self) -> str:
+        return self.config.get("webhook_secret", "")
+
     # ------------------------------------------------------------------
     # Lifecycle
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        self._send_emergency = self.send_emergency
+        self._send_ai = self.send_ai
+        self._send_all = self.send_all
+        self._inbound_channel_index = self.inbound_channel_index
+        self._poll_interval = self.poll_interval
+        self._bot_token = self.bot_token
+        self._chat_id = self.chat_id
+        # Telegram only signs pushes when given a secret; never accept unsigned ones
+        self._webhook_secret = self.webhook_secret or secrets.token_urlsafe(32)
+        # send_message can only forward anything when this holds
+        self._relay_out = ((self._send_all or self._send_ai)
+                           and self._inbound_channel_index is not None)
         self._poll_thread = None
         self._stop_event = threading.Event()
         self._last_update_id = 0
+        self._session = _make_session() if requests else None
+        # Mesh sends are queued here so a slow radio does not hold up polling
+        self._tx = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="telegram-tx")
+        self._webhook_active = False
+        self._send_url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
 
         status = []
         if self.bot_token:
@@ -93,6 +156,9 @@ class TelegramExtension(BaseExtension):
         self.log(f"Telegram enabled. {', '.join(status) if status else 'No settings configured.'}")
 
         if self.bot_token and self.chat_id and self.receive_enabled:
+            if self.webhook_public_url and self._set_webhook():
+                self.log("Telegram webhook registered; polling disabled.")
+                return
             self._poll_thread = threading.Thread(
                 target=self._poll_telegram,
                 daemon=True,
@@ -105,6 +171,11 @@ class TelegramExtension(BaseExtension):
         self._stop_event.set()
         if self._poll_thread and self._poll_thread.is_alive():
             self._poll_thread.join(timeout=5)
+        if self._webhook_active:
+            self._delete_webhook()
+        self._tx.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("Telegram extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -112,25 +183,23 @@ class TelegramExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def send_message(self, message: str, metadata: dict | None = None) -> None:
+        if not self._relay_out:
+            return
         metadata = metadata or {}
         is_ai = metadata.get("is_ai_response", False)
         ch_idx = metadata.get("channel_idx")
 
-        if self.send_all and not is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
-                self._send_telegram(message)
+        if ch_idx != self._inbound_channel_index:
             return
-
-        if self.send_ai and is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
-                self._send_telegram(message)
+        if self._send_ai if is_ai else self._send_all:
+            self._send_telegram(message)
 
     def on_message(self, message: str, metadata: dict | None = None) -> None:
-        if not self.send_all:
+        if not self._send_all or self._inbound_channel_index is None:
             return
         metadata = metadata or {}
         ch_idx = metadata.get("channel_idx")
-        if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if ch_idx == self._inbound_channel_index:
             sender = metadata.get("sender_info", "Unknown")
             self._send_telegram(f"<b>{sender}</b>: {message}")
 
@@ -139,75 +208,169 @@ class TelegramExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_emergency(self, message: str, gps_coords: dict | None = None) -> None:
-        if self.send_emergency:
+        if self._send_emergency:
             try:
                 self._send_telegram(f"🚨 <b>EMERGENCY ALERT</b>\n{message}")
                 self.log("✅ Emergency alert posted to Telegram.")
             except Exception as exc:
                 self.log(f"⚠️ Telegram emergency error: {exc}")
 
+    # ------------------------------------------------------------------
+    # Flask routes (inbound webhook)
+    # ------------------------------------------------------------------
+
+    def register_routes(self, app) -> None:
+        ext = self  # closure reference
+
+        @app.route("/telegram_webhook", methods=["POST"],
+                    endpoint="telegram_ext_webhook")
+        def telegram_webhook():
+            from flask import request, jsonify
+
+            if not ext._webhook_active:
+                return jsonify({"status": "disabled",
+                                "message": "Telegram webhook is not active"}), 200
+
+            token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+            if not hmac.compare_digest(token, ext._webhook_secret):
+                return jsonify({"status": "error",
+                                "message": "Invalid secret token"}), 403
+
+            update = request.get_json(silent=True)
+            if not update:
+                return jsonify({"status": "error",
+                                "message": "No JSON payload provided"}), 400
+
+            try:
+                ext._relay_updates([update])
+            except Exception as exc:
+                ext.log(f"⚠️ Telegram webhook error: {exc}")
+            # Always acknowledge so Telegram does not redeliver the update
+            return jsonify({"status": "ok"})
+
     # ------------------------------------------------------------------
     # Inbound: Telegram → Mesh (long-poll via getUpdates)
     # ------------------------------------------------------------------
 
     def _poll_telegram(self) -> None:
-        time.sleep(5)
+        if self._stop_event.wait(5):
+            return
+        # A webhook left registered (e.g. after a crash) makes getUpdates 409
+        self._delete_webhook()
         base = f"https://api.telegram.org/bot{self.bot_token}"
+        delay = self._poll_interval
 
         while not self._stop_event.is_set():
             try:
+                # Telegram parks getUpdates until an update arrives or the
+                # long-poll timeout ends, so no sleep is needed between calls
                 params = {
                     "offset": self._last_update_id + 1,
-                    "timeout": self.poll_interval,
+                    "timeout": _LONG_POLL_TIMEOUT,
                     "allowed_updates": '["message"]',
                 }
-                resp = requests.get(f"{base}/getUpdates", params=params,
-                                    timeout=self.poll_interval + 5)
-                data = resp.json()
+                resp = self._session.get(f"{base}/getUpdates", params=params,
+                                         timeout=_LONG_POLL_TIMEOUT + 5)
+                data = _json_loads(resp.content)
                 if data.get("ok"):
-                    for update in data.get("result", []):
-                        self._last_update_id = update["update_id"]
-                        msg = update.get("message")
-                        if not msg:
-                            continue
-                        # Only accept messages from the configured chat
-                        msg_chat_id = str(msg.get("chat", {}).get("id", ""))
-                        if msg_chat_id != self.chat_id:
-                            continue
-                        text = msg.get("text", "")
-                        if not text:
-                            continue
-                        user = msg.get("from", {})
-                        username = user.get("username") or user.get("first_name", "TGUser")
-                        formatted = f"[TG:{username}] {text}"
-                        log_fn = self.app_context.get("log_message")
-                        if log_fn:
-                            log_fn("Telegram", formatted, direct=False,
-                                   channel_idx=self.inbound_channel_index)
-                        if self.inbound_channel_index is not None:
-                            self.send_to_mesh(formatted,
-                                              channel_index=self.inbound_channel_index)
-                        self.log(f"Polled TG message: {formatted}")
-                else:
-                    self.log(f"Telegram API error: {data}")
+                    self._relay_updates(data.get("result", []))
+                    delay = self._poll_interval
+                    continue
+                self.log(f"Telegram API error: {data}")
+                # A 429 reply names how long Telegram wants us to wait
+                retry_after = (data.get("parameters") or {}).get("retry_after")
+                if retry_after:
+                    delay = max(delay, int(retry_after))
             except Exception as exc:
                 self.log(f"Error polling Telegram: {exc}")
-                time.sleep(5)
+            # Back off exponentially while Telegram errors; reset on success
+            if self._stop_event.wait(delay):
+                break
+            delay = min(delay * 2, _MAX_BACKOFF)
+
+    def _relay_updates(self, updates: list) -> None:
+        """Route a batch of updates (getUpdates or webhook) onto the mesh.
+
+        The whole batch is drained before the offset is advanced once; the
+        next getUpdates call (offset = last + 1) confirms all of them.
+        """
+        last_id = self._last_update_id
+        try:
+            for update in updates:
+                last_id = update["update_id"]
+                msg = update.get("message")
+                if not msg:
+                    continue
+                # Only accept messages from the configured chat
+                msg_chat_id = str(msg.get("chat", {}).get("id", ""))
+                if msg_chat_id != self._chat_id:
+                    continue
+                text = msg.get("text", "")
+                if not text:
+                    continue
+                user = msg.get("from", {})
+                username = user.get("username") or user.get("first_name", "TGUser")
+                formatted = f"[TG:{username}] {text}"
+                log_fn = self.app_context.get("log_message")
+                if log_fn:
+                    log_fn("Telegram", formatted, direct=False,
+                           channel_idx=self._inbound_channel_index)
+                if self._inbound_channel_index is not None:
+                    self._tx.submit(self._mesh_send, formatted,
+                                    self._inbound_channel_index)
+                self.log(f"Received TG message: {formatted}")
+        finally:
+            self._last_update_id = last_id
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _mesh_send(self, text: str, channel_index: int) -> None:
+        """Send from the TX thread, logging errors the executor would swallow."""
+        try:
+            self.send_to_mesh(text, channel_index=channel_index)
+        except Exception as exc:
+            self.log(f"⚠️ Mesh send error: {exc}")
+
+    def _set_webhook(self) -> bool:
+        """Point Telegram at ``webhook_public_url``; False if it refused."""
+        payload = {"url": self.webhook_public_url,
+                   "allowed_updates": ["message"],
+                   "secret_token": self._webhook_secret}
+        try:
+            resp = self._session.post(
+                f"https://api.telegram.org/bot{self.bot_token}/setWebhook",
+                json=payload, timeout=10)
+            data = _json_loads(resp.content)
+        except Exception as exc:
+            self.log(f"⚠️ Telegram setWebhook error: {exc}; falling back to polling.")
+            return False
+        if not data.get("ok"):
+            self.log(f"⚠️ Telegram setWebhook failed: {data}; falling back to polling.")
+            return False
+        self._webhook_active = True
+        return True
+
+    def _delete_webhook(self) -> None:
+        """Unregister the webhook so a later getUpdates poller is not refused."""
+        self._webhook_active = False
+        try:
+            self._session.post(
+                f"https://api.telegram.org/bot{self.bot_token}/deleteWebhook",
+                timeout=10)
+        except Exception as exc:
+            self.log(f"⚠️ Telegram deleteWebhook error: {exc}")
+
     def _send_telegram(self, text: str) -> None:
         """Send a message via the Telegram Bot API."""
-        if not self.bot_token or not self.chat_id:
+        if not self._bot_token or not self._chat_id:
             return
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
         try:
-            requests.post(url, json={
-                "chat_id": self.chat_id,
+            self._session.post(self._send_url, data=_json_dumps({
+                "chat_id": self._chat_id,
                 "text": text,
                 "parse_mode": "HTML",
-            })
+            }), headers=_JSON_HEADERS, timeout=10)
         except Exception as exc:
             self.log(f"⚠️ Telegram send error: {exc}")
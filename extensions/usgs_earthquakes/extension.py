@@ -7,27 +7,141 @@ events and broadcasts alerts onto the mesh.
 
 Features:
 - Polls USGS GeoJSON feed at a configurable interval.
-- Filters by minimum magnitude and optional geographic radius.
+- Filters by minimum magnitude and optional geographic radius (results
+  are then listed nearest-first).
 - Auto-broadcasts new earthquakes meeting the threshold.
 - /quake command — show recent significant earthquakes.
 - /quakeconfig — show current filter settings.
 
-The USGS API is free and requires no API key.
+The USGS API is free and requires no API key.  Responses are stream-parsed
+with ``ijson`` when it is installed.
 """
 
+import concurrent.futures
+import functools
+import itertools
+import json
 import threading
 import time
 import math
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
 from extensions.base_extension import BaseExtension
 
 
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient API failures."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3,
+                  status_forcelist=(429, 500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4,
+                                          max_retries=retry))
+    return session
+
+
+# Quake IDs remembered for de-duplication
+_SEEN_MAX = 500
+
+# Longest pause between polls while USGS keeps failing
+_MAX_BACKOFF = 600
+
+# Longest single mesh send; matches the core's default chunk_size
+_MESH_MAX_LEN = 200
+
+_SEP = "\n---\n"
+
+
+def _chunk(text: str, max_len: int = _MESH_MAX_LEN) -> list[str]:
+    """Split *text* on ``---`` separators into pieces of at most *max_len*.
+
+    Entries are never cut in half; one that is longer than *max_len* on
+    its own is sent alone and left to the core chunker.
+    """
+    if len(text) <= max_len:
+        return [text]
+    chunks: list[str] = []
+    current = ""
+    for part in text.split(_SEP):
+        if current and len(current) + len(_SEP) + len(part) > max_len:
+            chunks.append(current)
+            current = part
+        else:
+            current = f"{current}{_SEP}{part}" if current else part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+_EARTH_RADIUS_KM = 6371.0
+
+# Shared stand-in for a feature without "properties"; never mutated
+_NO_PROPS: dict = {}
+
+
+def _sort_by_distance(features: list, lat: float, lon: float) -> list:
+    """Return *features* ordered nearest-first from (*lat*, *lon*).
+
+    Haversine on the GeoJSON ``[lon, lat, depth]`` coordinates, with the
+    centre's trig hoisted out of the loop; features without usable
+    coordinates sort last.
+    """
+    lat1 = math.radians(lat)
+    lon1 = math.radians(lon)
+    cos_lat1 = math.cos(lat1)
+
+    def distance(feature: dict) -> float:
+        coords = (feature.get("geometry") or {}).get("coordinates") or ()
+        try:
+            lat2 = math.radians(coords[1])
+            dlon = math.radians(coords[0]) - lon1
+        except (IndexError, TypeError):
+            return math.inf
+        dlat = lat2 - lat1
+        a = (math.sin(dlat / 2) ** 2
+             + cos_lat1 * math.cos(lat2) * math.sin(dlon / 2) ** 2)
+        return 2 * _EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+    return sorted(features, key=distance)
+
+
+# One template renders the whole quake body in a single allocation
+_QUAKE_TMPL = "🌍 M{mag} — {place}\n{time_str} | Depth: {depth}km\n📍 {lat}, {lon}"
+
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+           "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+@functools.lru_cache(maxsize=256)
+def _fmt_ts(minute_bucket: int) -> str:
+    """Render an epoch minute as ``HH:MM UTC Mon DD``.
+
+    Quakes in one feed cluster within a few minutes of each other, so the
+    cache turns most calls into a dict hit.
+    """
+    tm = time.gmtime(minute_bucket * 60)
+    return (f"{tm.tm_hour:02d}:{tm.tm_min:02d} UTC "
+            f"{_MONTHS[tm.tm_mon - 1]} {tm.tm_mday:02d}")
+
+
 class UsgsEarthquakesExtension(BaseExtension):
     """USGS earthquake monitoring extension."""
 
@@ -99,9 +213,39 @@ class UsgsEarthquakesExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        self._min_magnitude = self.min_magnitude
+        self._poll_interval = self.poll_interval
+        self._broadcast_channel = self.broadcast_channel
+        self._lookback_minutes = self.lookback_minutes
+        self._include_tsunami = self.include_tsunami
+        self._max_results = self.max_results
+        # Radius filter params and the parsed centre for distance sorting
+        self._geo_params = {}
+        self._center = None
+        if self.center_lat and self.center_lon:
+            self._geo_params = {"latitude": self.center_lat,
+                                "longitude": self.center_lon,
+                                "maxradiuskm": self.max_radius_km}
+            try:
+                center = (float(self.center_lat), float(self.center_lon))
+            except ValueError:
+                center = None
+            if center and all(map(math.isfinite, center)):
+                self._center = center
+            else:
+                self.log("⚠️ center_lat/center_lon are not numbers; "
+                         "results will not be sorted by distance.")
         self._poll_thread = None
         self._stop_event = threading.Event()
-        self._seen_ids: set = set()
+        # Insertion-ordered so the oldest quake ID is evicted first
+        self._seen_ids: OrderedDict[str, None] = OrderedDict()
+        self._session = _make_session() if requests else None
+        # Mesh sends are queued here so a slow radio does not hold up polling
+        self._tx = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="usgs-tx")
+        # Validators from the poller's last 200 response
+        self._etag = None
+        self._last_modified = None
 
         status = [f"min_mag={self.min_magnitude}"]
         if self.center_lat and self.center_lon:
@@ -122,6 +266,9 @@ class UsgsEarthquakesExtension(BaseExtension):
         self._stop_event.set()
         if self._poll_thread and self._poll_thread.is_alive():
             self._poll_thread.join(timeout=10)
+        self._tx.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("USGS Earthquakes extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -141,7 +288,7 @@ class UsgsEarthquakesExtension(BaseExtension):
             return "\n".join(parts)
 
         if command == "/quake":
-            min_mag = self.min_magnitude
+            min_mag = self._min_magnitude
             if args.strip():
                 try:
                     min_mag = float(args.strip())
@@ -155,7 +302,7 @@ class UsgsEarthquakesExtension(BaseExtension):
             lines = [f"🌍 Earthquakes M{min_mag}+:"]
             for q in quakes[:5]:
                 lines.append(self._format_quake(q))
-            return "\n---\n".join(lines)
+            return _SEP.join(lines)
 
         return None
 
@@ -164,81 +311,137 @@ class UsgsEarthquakesExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def _poll_usgs(self) -> None:
-        time.sleep(10)
+        if self._stop_event.wait(10):
+            return
+        delay = self._poll_interval
 
         while not self._stop_event.is_set():
+            quakes = None
             try:
-                quakes = self._fetch_earthquakes()
-                for q in quakes:
-                    qid = q.get("id", "")
-                    if qid and qid not in self._seen_ids:
-                        self._seen_ids.add(qid)
-                        text = self._format_quake(q)
-                        self.send_to_mesh(text, channel_index=self.broadcast_channel)
-                        self.log(f"Broadcast earthquake: {qid}")
+                quakes = self._fetch_earthquakes(conditional=True)
+                new_texts: list[str] = []
+                tsunami_texts: list[str] = []
+                # Bind per-poll invariants once instead of per quake
+                seen = self._seen_ids
+                format_quake = self._format_quake
+                include_tsunami = self._include_tsunami
+                for q in quakes or ():
+                    qid = q.get("id")
+                    if qid and qid not in seen:
+                        seen[qid] = None
+                        if len(seen) > _SEEN_MAX:
+                            seen.popitem(last=False)
+                        new_texts.append(format_quake(q))
+                        self.log(f"New earthquake: {qid}")
 
                         # Check tsunami warning
-                        props = q.get("properties", {})
-                        tsunami = props.get("tsunami", 0)
-                        if self.include_tsunami and tsunami:
-                            self.send_to_mesh(
+                        props = q.get("properties") or _NO_PROPS
+                        if include_tsunami and props.get("tsunami"):
+                            tsunami_texts.append(
                                 f"🌊 TSUNAMI WARNING associated with earthquake: "
-                                f"{props.get('title', 'Unknown')}",
-                                channel_index=self.broadcast_channel,
+                                f"{props.get('title', 'Unknown')}"
                             )
 
-                # Trim seen set
-                if len(self._seen_ids) > 500:
-                    excess = len(self._seen_ids) - 250
-                    for _ in range(excess):
-                        self._seen_ids.pop()
+                # One flush per poll: a swarm goes out as a few packed
+                # messages instead of one or two transmissions per quake.
+                # dict.fromkeys drops repeated tsunami notices, keeping order.
+                if new_texts:
+                    texts = new_texts + list(dict.fromkeys(tsunami_texts))
+                    channel = self._broadcast_channel
+                    for chunk in _chunk(_SEP.join(texts)):
+                        self._tx.submit(self._mesh_send, chunk, channel)
+                    self.log(f"Queued {len(new_texts)} earthquake(s) for broadcast.")
 
             except Exception as exc:
                 self.log(f"USGS poll error: {exc}")
 
-            for _ in range(self.poll_interval):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(1)
+            # Back off exponentially while USGS errors; reset on success
+            if quakes is None:
+                delay = min(delay * 2, _MAX_BACKOFF)
+            else:
+                delay = self._poll_interval
+            if self._stop_event.wait(timeout=delay):
+                break
 
     # ------------------------------------------------------------------
     # API helpers
     # ------------------------------------------------------------------
 
-    def _fetch_earthquakes(self, min_mag: float | None = None) -> list:
-        """Fetch earthquakes from USGS GeoJSON feed."""
-        mag = min_mag if min_mag is not None else self.min_magnitude
+    def _mesh_send(self, text: str, channel_index: int) -> None:
+        """Send from the TX thread, logging errors the executor would swallow."""
+        try:
+            self.send_to_mesh(text, channel_index=channel_index)
+        except Exception as exc:
+            self.log(f"⚠️ Mesh send error: {exc}")
+
+    def _fetch_earthquakes(self, min_mag: float | None = None,
+                           conditional: bool = False) -> list | None:
+        """Fetch earthquakes from USGS GeoJSON feed; None if the request failed.
+
+        With *conditional* (the poller), the previous response's ETag and
+        Last-Modified are sent back and a 304 returns ``[]``: nothing new
+        to broadcast, and no body to download or parse.  /quake always
+        fetches the full list.
+        """
+        mag = min_mag if min_mag is not None else self._min_magnitude
         # Use the query API for filtering
         params = {
             "format": "geojson",
             "minmagnitude": mag,
             "orderby": "time",
-            "limit": self.max_results,
+            "limit": self._max_results,
         }
         # Time window
         now = datetime.now(timezone.utc)
-        start = now - timedelta(minutes=self.lookback_minutes)
+        start = now - timedelta(minutes=self._lookback_minutes)
         params["starttime"] = start.strftime("%Y-%m-%dT%H:%M:%S")
 
         # Geographic filter
-        if self.center_lat and self.center_lon:
-            params["latitude"] = self.center_lat
-            params["longitude"] = self.center_lon
-            params["maxradiuskm"] = self.max_radius_km
+        params.update(self._geo_params)
+
+        headers = {}
+        if conditional:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
 
         try:
-            resp = requests.get(
+            with self._session.get(
                 "https://earthquake.usgs.gov/fdsnws/event/1/query",
                 params=params,
+                headers=headers,
+                stream=True,
                 timeout=15,
-            )
-            if resp.status_code == 200:
-                return resp.json().get("features", [])
-            else:
-                self.log(f"USGS API error: {resp.status_code}")
+            ) as resp:
+                if resp.status_code == 304:
+                    return []
+                if resp.status_code != 200:
+                    self.log(f"USGS API error: {resp.status_code}")
+                    return None
+                features = self._read_features(resp)
+                # Only after a clean parse, or a later 304 would hide quakes
+                if conditional:
+                    self._etag = resp.headers.get("ETag")
+                    self._last_modified = resp.headers.get("Last-Modified")
+            if self._center and len(features) > 1:
+                features = _sort_by_distance(features, *self._center)
+            return features
         except Exception as exc:
             self.log(f"USGS fetch error: {exc}")
-        return []
+        return None
+
+    def _read_features(self, resp) -> list:
+        """Return up to ``max_results`` features from a streamed response.
+
+        With ``ijson`` installed the features are parsed one at a time as
+        the body arrives, and reading stops once enough are collected.
+        """
+        if ijson is not None:
+            resp.raw.decode_content = True
+            items = ijson.items(resp.raw, "features.item", use_float=True)
+            return list(itertools.islice(items, self._max_results))
+        return _json_loads(resp.content).get("features", [])
 
     def _format_quake(self, feature: dict) -> str:
         """Format an earthquake feature into a mesh-friendly string."""
@@ -253,8 +456,7 @@ class UsgsEarthquakesExtension(BaseExtension):
 
         # Convert epoch ms to readable time
         if time_ms:
-            dt = datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc)
-            time_str = dt.strftime("%H:%M UTC %b %d")
+            time_str = _fmt_ts(int(time_ms) // 60000)
         else:
             time_str = "?"
 
@@ -262,8 +464,8 @@ class UsgsEarthquakesExtension(BaseExtension):
         lat = coords[1] if len(coords) > 1 else "?"
         lon = coords[0] if len(coords) > 0 else "?"
 
-        text = f"🌍 M{mag} — {place}\n{time_str} | Depth: {depth}km"
-        text += f"\n📍 {lat}, {lon}"
+        text = _QUAKE_TMPL.format(mag=mag, place=place, time_str=time_str,
+                                  depth=depth, lat=lat, lon=lon)
         if tsunami:
             text += "\n🌊 Tsunami warning!"
         return text
@@ -12,18 +12,113 @@ This extension is designed to integrate with services that don't have a
 dedicated extension — any system that can send/receive JSON webhooks.
 """
 
+import concurrent.futures
+import gzip
 import json
 import hmac
 import hashlib
+import re
+import threading
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
 from extensions.base_extension import BaseExtension
 
 
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient send failures."""
+    session = requests.Session()
+    # Throttling and gateway errors are retried with backoff (and
+    # Retry-After); read errors and 500s are not, as the send may have landed.
+    retry = Retry(total=3, read=0, backoff_factor=0.3,
+                  status_forcelist=[429, 502, 503, 504],
+                  allowed_methods=["GET", "POST", "PUT"],
+                  respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Most outbound sends allowed to wait on the send thread
+_MAX_PENDING = 1024
+
+# Outbound bodies at least this large are gzipped when compress_outbound is on
+_GZIP_MIN_BYTES = 512
+
+# Largest inbound webhook body accepted; bigger requests are refused unread
+_MAX_BODY = 1 << 20
+
+# Fixed inbound replies, encoded once rather than by jsonify per request
+_OK_BODY = b'{"status":"ok"}'
+_DISABLED_BODY = b'{"status":"disabled"}'
+_TOO_LARGE_BODY = b'{"status":"too_large"}'
+_UNAUTHORIZED_BODY = b'{"status":"unauthorized"}'
+
+
+def _read_body(stream) -> bytes | None:
+    """Read an inbound body of at most ``_MAX_BODY`` bytes; None if larger.
+
+    Reads from the request stream so a chunked upload, which carries no
+    Content-Length, is cut off at the cap as well.
+    """
+    body = bytearray()
+    while len(body) <= _MAX_BODY:
+        chunk = stream.read(_MAX_BODY + 1 - len(body))
+        if not chunk:
+            return bytes(body)
+        body += chunk
+    return None
+
+
+# A {{name}} placeholder in the outbound template
+_PLACEHOLDER = re.compile(r"\{\{([^{}]+)\}\}")
+
+
+def _render(node, message: str, metadata: dict):
+    """Return a copy of the parsed template *node* with placeholders filled.
+
+    ``{{message}}`` takes *message*, any other ``{{key}}`` takes
+    ``str(metadata[key])``; unknown placeholders are left as they are.
+    Values are substituted into the parsed strings, so quotes or newlines
+    in a message can no longer break the JSON body.
+    """
+    if isinstance(node, str):
+        if "{{" not in node:
+            return node
+
+        def fill(match):
+            key = match.group(1)
+            if key == "message":
+                return message
+            if key in metadata:
+                return str(metadata[key])
+            return match.group(0)
+
+        return _PLACEHOLDER.sub(fill, node)
+    if isinstance(node, dict):
+        return {_render(k, message, metadata): _render(v, message, metadata)
+                for k, v in node.items()}
+    if isinstance(node, list):
+        return [_render(v, message, metadata) for v in node]
+    return node
+
+
 class WebhookGenericExtension(BaseExtension):
     """Generic Webhook ↔ Mesh bridge extension."""
 
@@ -60,6 +155,10 @@ class WebhookGenericExtension(BaseExtension):
         return self.config.get("outbound_template",
                                '{"text": "{{message}}", "source": "mesh-api"}')
 
+    @property
+    def compress_outbound(self) -> bool:
+        return bool(self.config.get("compress_outbound", False))
+
     @property
     def send_emergency(self) -> bool:
         return bool(self.config.get("send_emergency", False))
@@ -102,6 +201,43 @@ class WebhookGenericExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        # Outbound calls are made from here so mesh hooks never wait on the
+        # remote endpoint (the thread starts on first use)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="webhook-send")
+        # Caps queued sends so a dead endpoint cannot grow the backlog forever
+        self._slots = threading.BoundedSemaphore(_MAX_PENDING)
+        self._session = _make_session() if requests else None
+        self._send_emergency = self.send_emergency
+        self._send_ai = self.send_ai
+        self._send_all = self.send_all
+        self._inbound_channel_index = self.inbound_channel_index
+        # send_message can only forward anything when this holds
+        self._relay_out = ((self._send_all or self._send_ai)
+                           and self._inbound_channel_index is not None)
+        self._receive_enabled = self.receive_enabled
+        self._message_field = self.message_field
+        self._sender_field = self.sender_field
+        # Keyed HMAC state, derived once; each request verifies on a copy
+        secret = self.receive_secret.encode()
+        self._hmac_keyed = (hmac.new(secret, digestmod=hashlib.sha256)
+                            if secret else None)
+        self._outbound_url = self.outbound_url
+        self._outbound_method = self.outbound_method
+        self._outbound_headers = {"Content-Type": "application/json",
+                                  **self.outbound_headers}
+        self._compress = self.compress_outbound
+        self._gzip_headers = {**self._outbound_headers,
+                              "Content-Encoding": "gzip"}
+        self._template = self.outbound_template
+        # Parsed once; None when placeholders sit outside JSON strings, in
+        # which case each message falls back to text replacement
+        try:
+            self._body_skeleton = json.loads(self._template)
+        except ValueError:
+            self._body_skeleton = None
+        # Literal text and placeholder names alternate: [text, name, text, ...]
+        self._template_parts = _PLACEHOLDER.split(self._template)
         status = []
         if self.outbound_url:
             status.append(f"out={self.outbound_url}")
@@ -110,6 +246,9 @@ class WebhookGenericExtension(BaseExtension):
         self.log(f"Webhook_Generic enabled. {', '.join(status) if status else 'No settings configured.'}")
 
     def on_unload(self) -> None:
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("Webhook_Generic extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -122,69 +261,86 @@ class WebhookGenericExtension(BaseExtension):
         @app.route(ext.receive_endpoint, methods=["POST"],
                     endpoint="webhook_generic_inbound")
         def webhook_generic_inbound():
-            from flask import request, jsonify
-
-            if not ext.receive_enabled:
-                return jsonify({"status": "disabled"}), 200
-
-            # Optional HMAC signature verification
-            if ext.receive_secret:
-                sig_header = request.headers.get("X-Signature-256", "")
-                body = request.get_data()
-                expected = "sha256=" + hmac.new(
-                    ext.receive_secret.encode(),
-                    body,
-                    hashlib.sha256,
-                ).hexdigest()
-                if not hmac.compare_digest(sig_header, expected):
-                    return jsonify({"status": "unauthorized"}), 401
-
-            data = request.json
-            if not data:
+            from flask import request, jsonify, Response
+
+            if not ext._receive_enabled:
+                return Response(_DISABLED_BODY, mimetype="application/json")
+
+            body = None
+            if (request.content_length or 0) <= _MAX_BODY:
+                body = _read_body(request.stream)
+            if body is None:
+                return Response(_TOO_LARGE_BODY, status=413,
+                                mimetype="application/json")
+
+            # The same bytes are verified and then parsed
+            if not ext._verify_signature(request, body):
+                return Response(_UNAUTHORIZED_BODY, status=401,
+                                mimetype="application/json")
+
+            try:
+                data = _json_loads(body) if body else None
+            except ValueError:
+                data = None
+            if not data or not isinstance(data, dict):
                 return jsonify({"status": "error",
                                 "message": "No JSON payload"}), 400
 
-            text = data.get(ext.message_field)
-            sender = data.get(ext.sender_field, "Webhook")
+            text = data.get(ext._message_field)
+            sender = data.get(ext._sender_field, "Webhook")
             if not text:
                 return jsonify({"status": "error",
-                                "message": f"Missing '{ext.message_field}' field"}), 400
+                                "message": f"Missing '{ext._message_field}' field"}), 400
 
             formatted = f"[WH:{sender}] {text}"
             log_fn = ext.app_context.get("log_message")
             if log_fn:
                 log_fn("Webhook", formatted, direct=False,
-                       channel_idx=ext.inbound_channel_index)
-            if ext.inbound_channel_index is not None:
+                       channel_idx=ext._inbound_channel_index)
+            if ext._inbound_channel_index is not None:
                 ext.send_to_mesh(formatted,
-                                 channel_index=ext.inbound_channel_index)
+                                 channel_index=ext._inbound_channel_index)
             ext.log(f"Inbound webhook: {formatted}")
-            return jsonify({"status": "ok"})
+            return Response(_OK_BODY, mimetype="application/json")
+
+    def _verify_signature(self, request, body: bytes) -> bool:
+        """Check ``X-Signature-256`` against *body*; True if no secret is set."""
+        if self._hmac_keyed is None:
+            return True
+        sig_header = request.headers.get("X-Signature-256", "")
+        if not sig_header.startswith("sha256="):
+            return False
+        try:
+            provided = bytes.fromhex(sig_header[7:])
+        except ValueError:
+            return False
+        mac = self._hmac_keyed.copy()
+        mac.update(body)
+        return hmac.compare_digest(mac.digest(), provided)
 
     # ------------------------------------------------------------------
     # Outbound: mesh → Webhook
     # ------------------------------------------------------------------
 
     def send_message(self, message: str, metadata: dict | None = None) -> None:
+        if not self._relay_out:
+            return
         metadata = metadata or {}
         is_ai = metadata.get("is_ai_response", False)
         ch_idx = metadata.get("channel_idx")
 
-        if self.send_all and not is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
-                self._fire_webhook(message, metadata)
+        if ch_idx != self._inbound_channel_index:
             return
-
-        if self.send_ai and is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
-                self._fire_webhook(message, metadata)
+        # send_ai covers AI responses, send_all everything else
+        if self._send_ai if is_ai else self._send_all:
+            self._fire_webhook(message, metadata)
 
     def on_message(self, message: str, metadata: dict | None = None) -> None:
-        if not self.send_all:
+        if not self._send_all or self._inbound_channel_index is None:
             return
         metadata = metadata or {}
         ch_idx = metadata.get("channel_idx")
-        if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if ch_idx == self._inbound_channel_index:
             sender = metadata.get("sender_info", "Unknown")
             self._fire_webhook(f"{sender}: {message}", metadata)
 
@@ -193,13 +349,13 @@ class WebhookGenericExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_emergency(self, message: str, gps_coords: dict | None = None) -> None:
-        if self.send_emergency:
+        if self._send_emergency:
             try:
                 meta = {"type": "emergency"}
                 if gps_coords:
                     meta["gps"] = gps_coords
                 self._fire_webhook(f"🚨 EMERGENCY: {message}", meta)
-                self.log("✅ Emergency alert fired via webhook.")
+                self.log("✅ Emergency alert queued for webhook.")
             except Exception as exc:
                 self.log(f"⚠️ Webhook emergency error: {exc}")
 
@@ -207,34 +363,61 @@ class WebhookGenericExtension(BaseExtension):
     # Internal helpers
     # ------------------------------------------------------------------
 
-    def _fire_webhook(self, message: str, metadata: dict | None = None) -> None:
-        """Send a message to the outbound webhook URL."""
-        if not self.outbound_url:
+    def _submit(self, fn, *args) -> None:
+        """Queue *fn* on the send thread, dropping it if the backlog is full."""
+        if not self._slots.acquire(blocking=False):
+            self.log(f"⚠️ webhook send queue full ({_MAX_PENDING}); message dropped.")
             return
         try:
-            # Render template
-            body_str = self.outbound_template.replace("{{message}}", message)
-            # Try to add metadata fields
-            if metadata:
-                for key, val in metadata.items():
-                    body_str = body_str.replace(f"{{{{{key}}}}}", str(val))
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            # The executor was shut down by on_unload
+            self._slots.release()
+            return
+        future.add_done_callback(lambda _f: self._slots.release())
 
-            headers = {"Content-Type": "application/json"}
-            headers.update(self.outbound_headers)
+    def _fire_webhook(self, message: str, metadata: dict | None = None) -> None:
+        """Queue a message for background delivery to the outbound URL."""
+        if not self._outbound_url:
+            return
+        self._submit(self._deliver, message, metadata)
 
-            try:
-                body = json.loads(body_str)
-            except (json.JSONDecodeError, ValueError):
-                body = {"text": message}
-
-            if self.outbound_method == "POST":
-                requests.post(self.outbound_url, json=body,
-                              headers=headers, timeout=10)
-            elif self.outbound_method == "PUT":
-                requests.put(self.outbound_url, json=body,
-                             headers=headers, timeout=10)
+    def _deliver(self, message: str, metadata: dict | None) -> None:
+        """Send a message to the outbound webhook URL."""
+        try:
+            if self._body_skeleton is not None:
+                body = _render(self._body_skeleton, message, metadata or {})
             else:
-                requests.request(self.outbound_method, self.outbound_url,
-                                 json=body, headers=headers, timeout=10)
+                body = self._render_text(message, metadata)
+
+            data = _json_dumps(body)
+            headers = self._outbound_headers
+            if self._compress and len(data) >= _GZIP_MIN_BYTES:
+                data = gzip.compress(data, compresslevel=1)
+                headers = self._gzip_headers
+            self._session.request(self._outbound_method, self._outbound_url,
+                                  data=data, headers=headers, timeout=10)
         except Exception as exc:
             self.log(f"⚠️ Webhook fire error: {exc}")
+
+    def _render_text(self, message: str, metadata: dict | None):
+        """Render a template that is not valid JSON until filled in.
+
+        Walks the pre-split template once instead of running one
+        ``str.replace`` pass per metadata key.
+        """
+        metadata = metadata or {}
+        parts = self._template_parts[:]
+        for i in range(1, len(parts), 2):
+            key = parts[i]
+            if key == "message":
+                parts[i] = message
+            elif key in metadata:
+                parts[i] = str(metadata[key])
+            else:
+                parts[i] = f"{{{{{key}}}}}"
+        body_str = "".join(parts)
+        try:
+            return _json_loads(body_str)
+        except ValueError:
+            return {"text": message}
@@ -14,22 +14,92 @@ a System User permanent token, and a registered phone number ID.  See
 https://developers.facebook.com/docs/whatsapp/cloud-api/get-started
 for setup instructions.
 
-No additional dependencies beyond ``requests`` (already in requirements.txt).
+No additional dependencies beyond ``requests`` (already in requirements.txt);
+webhook payloads and outbound messages go through ``orjson`` when it
+is installed.
 """
 
+import concurrent.futures
 import hashlib
 import hmac
+import json
 import threading
 import time
+from collections import OrderedDict
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None
 
 from extensions.base_extension import BaseExtension
 
 
+def _make_session() -> "requests.Session":
+    """Build a keep-alive session that retries transient send failures."""
+    session = requests.Session()
+    # Throttling and gateway errors are retried with backoff (and
+    # Retry-After); read errors and 500s are not, as the send may have landed.
+    retry = Retry(total=3, read=0, backoff_factor=0.3,
+                  status_forcelist=[429, 502, 503, 504],
+                  allowed_methods=["GET", "POST", "PUT"],
+                  respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+    session.mount("https://", adapter)
+    return session
+
+
+# Most outbound sends allowed to wait on the send thread
+_MAX_PENDING = 1024
+
+# Most relayed mesh messages joined into one Cloud API message
+_BATCH_MAX = 5
+
+# Longest batch_window_ms honoured, so a typo cannot hold messages for hours
+_MAX_BATCH_WINDOW_MS = 5000
+
+# Inbound message IDs remembered so Meta's redeliveries are dropped
+_SEEN_MAX = 4096
+
+# Shared stand-in for a missing object in a webhook payload; never mutated
+_NO_FIELDS: dict = {}
+
+# Largest inbound webhook body accepted; bigger requests are refused unread
+_MAX_BODY = 1 << 20
+
+# Fixed inbound replies, encoded once rather than by jsonify per request
+_OK_BODY = b'{"status":"ok"}'
+_DISABLED_BODY = b'{"status":"disabled"}'
+_TOO_LARGE_BODY = b'{"status":"too_large"}'
+
+
+def _read_body(stream) -> bytes | None:
+    """Read an inbound body of at most ``_MAX_BODY`` bytes; None if larger.
+
+    Reads from the request stream so a chunked upload, which carries no
+    Content-Length, is cut off at the cap as well.
+    """
+    body = bytearray()
+    while len(body) <= _MAX_BODY:
+        chunk = stream.read(_MAX_BODY + 1 - len(body))
+        if not chunk:
+            return bytes(body)
+        body += chunk
+    return None
+
+
 class WhatsAppExtension(BaseExtension):
     """WhatsApp ↔ Mesh bridge extension."""
 
@@ -96,6 +166,11 @@ class WhatsAppExtension(BaseExtension):
         val = self.config.get("inbound_channel_index")
         return int(val) if val is not None else None
 
+    @property
+    def batch_window_ms(self) -> int:
+        """Milliseconds to gather relayed messages into one send (0 = off)."""
+        return int(self.config.get("batch_window_ms", 0))
+
     @property
     def webhook_path(self) -> str:
         return self.config.get("webhook_path", "/whatsapp/webhook")
@@ -123,6 +198,40 @@ class WhatsAppExtension(BaseExtension):
     # ------------------------------------------------------------------
 
     def on_load(self) -> None:
+        # Cloud API calls are made from here so mesh hooks never wait on
+        # Meta (the thread starts on first use)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="whatsapp-send")
+        # Caps queued sends so a dead endpoint cannot grow the backlog forever
+        self._slots = threading.BoundedSemaphore(_MAX_PENDING)
+        self._session = _make_session() if requests else None
+        self._send_emergency = self.send_emergency
+        self._send_ai = self.send_ai
+        self._send_all = self.send_all
+        self._inbound_channel_index = self.inbound_channel_index
+        # send_message can only forward anything when this holds
+        self._relay_out = ((self._send_all or self._send_ai)
+                           and self._inbound_channel_index is not None)
+        self._receive_enabled = self.receive_enabled
+        self._broadcast_channel_index = self.broadcast_channel_index
+        self._recipient_number = self.recipient_number
+        self._verify_token = self.verify_token
+        self._batch_window = min(max(self.batch_window_ms, 0),
+                                 _MAX_BATCH_WINDOW_MS) / 1000
+        self._batch: list[str] = []
+        self._batch_timer = None
+        self._batch_lock = threading.Lock()
+        # Set by on_unload so a late relay or timer cannot queue more sends
+        self._closed = False
+        self._seen_ids: OrderedDict[str, None] = OrderedDict()
+        self._seen_lock = threading.Lock()
+        self._can_send = bool(self.phone_number_id and self.access_token
+                              and self._recipient_number)
+        self._messages_url = f"{self.api_url}/{self.phone_number_id}/messages"
+        self._api_headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+        }
         if requests is None:
             self.log("⚠️ 'requests' library is not installed — WhatsApp extension cannot function.")
             return
@@ -141,6 +250,15 @@ class WhatsAppExtension(BaseExtension):
         )
 
     def on_unload(self) -> None:
+        with self._batch_lock:
+            self._closed = True
+            if self._batch_timer is not None:
+                self._batch_timer.cancel()
+                self._batch_timer = None
+            self._batch.clear()
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
         self.log("WhatsApp extension unloaded.")
 
     # ------------------------------------------------------------------
@@ -167,7 +285,7 @@ class WhatsAppExtension(BaseExtension):
             token = request.args.get("hub.verify_token", "")
             challenge = request.args.get("hub.challenge", "")
 
-            if mode == "subscribe" and token == ext.verify_token:
+            if mode == "subscribe" and token == ext._verify_token:
                 ext.log("✅ WhatsApp webhook verified.")
                 return Response(challenge, status=200, mimetype="text/plain")
 
@@ -178,33 +296,48 @@ class WhatsAppExtension(BaseExtension):
                     endpoint="whatsapp_webhook_inbound")
         def whatsapp_inbound():
             """Process inbound WhatsApp messages from the Cloud API webhook."""
-            from flask import request, jsonify
+            from flask import request, Response
 
-            if not ext.receive_enabled:
-                return jsonify({"status": "disabled"}), 200
+            if not ext._receive_enabled:
+                return Response(_DISABLED_BODY, mimetype="application/json")
 
-            data = request.get_json(silent=True)
-            if not data:
-                return jsonify({"status": "ok"}), 200
+            body = None
+            if (request.content_length or 0) <= _MAX_BODY:
+                body = _read_body(request.stream)
+            if body is None:
+                return Response(_TOO_LARGE_BODY, status=413,
+                                mimetype="application/json")
+
+            try:
+                data = _json_loads(body) if body else None
+            except ValueError:
+                data = None
+            if not data or not isinstance(data, dict):
+                return Response(_OK_BODY, mimetype="application/json")
 
             # Meta sends a nested structure:
             # entry[].changes[].value.messages[]
             try:
-                for entry in data.get("entry", []):
-                    for change in entry.get("changes", []):
-                        value = change.get("value", {})
-                        contacts = {
-                            c.get("wa_id", ""): c.get("profile", {}).get("name", "WhatsApp User")
-                            for c in value.get("contacts", [])
-                        }
-                        for msg in value.get("messages", []):
-                            msg_type = msg.get("type", "")
+                for entry in data.get("entry") or ():
+                    for change in entry.get("changes") or ():
+                        value = change.get("value") or _NO_FIELDS
+                        # Status callbacks and media carry no text; the
+                        # contacts map is only built once a text turns up
+                        contacts = None
+                        for msg in value.get("messages") or ():
                             # Only process text messages
-                            if msg_type != "text":
+                            if msg.get("type") != "text":
                                 continue
-                            text = msg.get("text", {}).get("body", "")
+                            text = (msg.get("text") or _NO_FIELDS).get("body", "")
                             if not text:
                                 continue
+                            if not ext._first_sighting(msg.get("id")):
+                                continue
+                            if contacts is None:
+                                contacts = {
+                                    c.get("wa_id", ""): (c.get("profile") or _NO_FIELDS).get("name", "WhatsApp User")
+                                    for c in value.get("contacts") or ()
+                                }
                             sender_id = msg.get("from", "")
                             sender_name = contacts.get(sender_id, sender_id)
 
@@ -215,19 +348,31 @@ class WhatsAppExtension(BaseExtension):
                                 log_fn(
                                     "WhatsApp", formatted,
                                     direct=False,
-                                    channel_idx=ext.broadcast_channel_index,
+                                    channel_idx=ext._broadcast_channel_index,
                                 )
 
                             ext.send_to_mesh(
                                 formatted,
-                                channel_index=ext.broadcast_channel_index,
+                                channel_index=ext._broadcast_channel_index,
                             )
                             ext.log(f"Inbound WA message: {formatted}")
             except Exception as exc:
                 ext.log(f"⚠️ Error processing WhatsApp webhook: {exc}")
 
             # Always return 200 so Meta doesn't retry
-            return jsonify({"status": "ok"}), 200
+            return Response(_OK_BODY, mimetype="application/json")
+
+    def _first_sighting(self, msg_id: str | None) -> bool:
+        """Record *msg_id*; False if Meta already delivered it recently."""
+        if not msg_id:
+            return True
+        with self._seen_lock:
+            if msg_id in self._seen_ids:
+                return False
+            self._seen_ids[msg_id] = None
+            if len(self._seen_ids) > _SEEN_MAX:
+                self._seen_ids.popitem(last=False)
+        return True
 
     # ------------------------------------------------------------------
     # Command handler
@@ -251,40 +396,37 @@ class WhatsAppExtension(BaseExtension):
 
     def send_message(self, message: str, metadata: dict | None = None) -> None:
         """Forward mesh messages to WhatsApp based on config flags."""
+        if not self._relay_out:
+            return
         metadata = metadata or {}
         is_ai = metadata.get("is_ai_response", False)
         ch_idx = metadata.get("channel_idx")
 
-        # send_all: forward non-AI messages from the watched channel
-        if self.send_all and not is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
-                self._send_whatsapp(message)
+        if ch_idx != self._inbound_channel_index:
             return
-
-        # send_ai: forward AI responses from the watched channel
-        if self.send_ai and is_ai:
-            if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
-                self._send_whatsapp(message)
+        # send_ai covers AI responses, send_all everything else
+        if self._send_ai if is_ai else self._send_all:
+            self._relay(message)
 
     def on_message(self, message: str, metadata: dict | None = None) -> None:
         """Observer hook — forward mesh messages to WhatsApp when send_all is on."""
-        if not self.send_all:
+        if not self._send_all or self._inbound_channel_index is None:
             return
         metadata = metadata or {}
         ch_idx = metadata.get("channel_idx")
-        if self.inbound_channel_index is not None and ch_idx == self.inbound_channel_index:
+        if ch_idx == self._inbound_channel_index:
             sender = metadata.get("sender_info", "Unknown")
-            self._send_whatsapp(f"*{sender}*: {message}")
+            self._relay(f"*{sender}*: {message}")
 
     # ------------------------------------------------------------------
     # Emergency hook
     # ------------------------------------------------------------------
 
     def on_emergency(self, message: str, gps_coords: dict | None = None) -> None:
-        if self.send_emergency:
+        if self._send_emergency:
             try:
                 self._send_whatsapp(f"🚨 *EMERGENCY ALERT*\n{message}")
-                self.log("✅ Emergency alert sent via WhatsApp.")
+                self.log("✅ Emergency alert queued for WhatsApp.")
             except Exception as exc:
                 self.log(f"⚠️ WhatsApp emergency error: {exc}")
 
@@ -292,7 +434,61 @@ class WhatsAppExtension(BaseExtension):
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _submit(self, fn, *args) -> bool:
+        """Queue *fn* on the send thread; False if the backlog is full."""
+        if not self._slots.acquire(blocking=False):
+            self.log(f"⚠️ WhatsApp send queue full ({_MAX_PENDING}); message dropped.")
+            return False
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            # The executor was shut down by on_unload
+            self._slots.release()
+            return False
+        future.add_done_callback(lambda _f: self._slots.release())
+        return True
+
+    def _relay(self, text: str) -> None:
+        """Queue a relayed mesh message, batching it when a window is set.
+
+        The first message of a burst starts a timer; anything relayed
+        before it fires rides along in the same Cloud API call.  The timer
+        waits on its own thread so the send thread stays free for
+        emergency alerts.
+        """
+        if not self._batch_window:
+            self._send_whatsapp(text)
+            return
+        if not self._can_send:
+            return
+        with self._batch_lock:
+            if self._closed:
+                return
+            self._batch.append(text)
+            if len(self._batch) > 1:
+                return
+            self._batch_timer = threading.Timer(self._batch_window,
+                                                self._flush_batch)
+            self._batch_timer.daemon = True
+            self._batch_timer.start()
+
+    def _flush_batch(self) -> None:
+        """Queue what gathered during the window on the send thread."""
+        with self._batch_lock:
+            if self._closed:
+                return
+            batch, self._batch = self._batch, []
+            self._batch_timer = None
+        for i in range(0, len(batch), _BATCH_MAX):
+            self._submit(self._post_whatsapp, "\n".join(batch[i:i + _BATCH_MAX]))
+
     def _send_whatsapp(self, text: str) -> None:
+        """Queue a text message for background delivery."""
+        if not self._can_send:
+            return
+        self._submit(self._post_whatsapp, text)
+
+    def _post_whatsapp(self, text: str) -> None:
         """Send a text message via the WhatsApp Cloud API.
 
         POST /{phone_number_id}/messages
@@ -300,23 +496,17 @@ class WhatsAppExtension(BaseExtension):
         message within 24 hours) or the business must use an approved
         message template.
         """
-        if not self.phone_number_id or not self.access_token or not self.recipient_number:
-            return
-
-        url = f"{self.api_url}/{self.phone_number_id}/messages"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
         payload = {
             "messaging_product": "whatsapp",
-            "to": self.recipient_number,
+            "to": self._recipient_number,
             "type": "text",
             "text": {"body": text},
         }
 
         try:
-            resp = requests.post(url, json=payload, headers=headers, timeout=10)
+            resp = self._session.post(self._messages_url,
+                                      data=_json_dumps(payload),
+                                      headers=self._api_headers, timeout=10)
             if resp.status_code not in (200, 201):
                 self.log(f"⚠️ WhatsApp API error {resp.status_code}: {resp.text[:200]}")
         except Exception as exc: